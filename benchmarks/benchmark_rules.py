@@ -0,0 +1,262 @@
+"""
+Throughput, latency and quality benchmark of the rule-based approach on the bundled datasets.
+
+Usage (from the repository root):
+    python benchmarks/benchmark_rules.py --model it_core_news_lg --sentences 100000 --output report.json
+    python benchmarks/benchmark_rules.py --save-baseline benchmarks/baseline.json
+    python benchmarks/benchmark_rules.py --baseline benchmarks/baseline.json --tolerance 0.1
+
+With --baseline, the exit status is 1 if throughput, latency or quality regressed beyond the tolerance,
+and 2 if the baseline was measured with a different model, corpus size, batching or trigger words list.
+"""
+import argparse
+import difflib
+import itertools
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import time
+from collections import OrderedDict
+from typing import Dict, List
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rule_based_approach import _spacy
+from rule_based_approach.component import DETECTOR_NAME
+from rule_based_approach.gender_mappings import articles, adjectives
+from rule_based_approach.pipeline import rewrite_many
+from rule_based_approach.trigger_lexicon import TriggerLexicon
+from rule_based_approach.utils import find_initial_nouns, identify_nouns_to_modify, modify_sentence_based_on_rules
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+STAGES = ('parse', 'find_initial_nouns', 'identify_nouns_to_modify', 'modify_sentence_based_on_rules')
+
+
+def load_sentences(path: str = os.path.join(DATA_DIR, 'non_inclusive_sentences.csv')) -> List[str]:
+    """
+    Loads the non-inclusive sentences of the corpus.
+    """
+    return pd.read_csv(path, delimiter=';')['non_inclusive_sentence'].dropna().tolist()
+
+
+def load_references(path: str = os.path.join(DATA_DIR, 'inclusive_rewriting_dataset.csv')) -> Dict[str, List[str]]:
+    """
+    Loads the reference rewrites, grouped by original sentence.
+    """
+    references = OrderedDict()
+    for source, target in pd.read_csv(path, delimiter=';')[['sentence1', 'sentence2']].dropna().itertuples(index=False):
+        references.setdefault(source, []).append(target)
+    return references
+
+
+def scale(sentences: List[str], size: int) -> List[str]:
+    """
+    Repeats the corpus until it has the given number of sentences.
+    """
+    return list(itertools.islice(itertools.cycle(sentences), size))
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of the values.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of the process, in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if platform.system() == 'Darwin' else peak / 1024
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    """
+    Mean and p50/p95/p99 of latencies given in seconds, reported in milliseconds.
+    """
+    return {
+        'mean_ms': 1000 * sum(values) / len(values) if values else 0.0,
+        'p50_ms': 1000 * percentile(values, 50),
+        'p95_ms': 1000 * percentile(values, 95),
+        'p99_ms': 1000 * percentile(values, 99),
+    }
+
+
+def bench_stages(sentences: List[str], lexicon: TriggerLexicon) -> Dict:
+    """
+    Runs the pipeline one sentence at a time and times every stage. The detector component is
+    disabled, since the rules are timed separately.
+    """
+    nlp = _spacy.get_nlp()
+    timings = {stage: [] for stage in STAGES}
+    totals = []
+    start = time.perf_counter()
+    for sentence in sentences:
+        t0 = time.perf_counter()
+        doc = nlp(sentence, disable=[DETECTOR_NAME])
+        t1 = time.perf_counter()
+        initial_nouns = find_initial_nouns(doc, lexicon)
+        t2 = time.perf_counter()
+        nouns_to_modify = identify_nouns_to_modify(initial_nouns, lexicon, verbose=False)
+        t3 = time.perf_counter()
+        modify_sentence_based_on_rules(doc, nouns_to_modify, lexicon, articles, adjectives, verbose=False)
+        t4 = time.perf_counter()
+        for stage, elapsed in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+            timings[stage].append(elapsed)
+        totals.append(t4 - t0)
+    elapsed = time.perf_counter() - start
+
+    report = {'sentences_per_sec': len(sentences) / elapsed if elapsed else 0.0}
+    report.update(latency_summary(totals))
+    report['stages'] = {stage: latency_summary(values) for stage, values in timings.items()}
+    for stage, values in timings.items():
+        report['stages'][stage]['share'] = sum(values) / sum(totals) if totals else 0.0
+    return report
+
+
+def bench_batch(sentences: List[str], batch_size: int, n_process: int) -> Dict:
+    """
+    Measures the throughput of rewrite_many.
+    """
+    start = time.perf_counter()
+    count = sum(1 for _ in rewrite_many(sentences, batch_size=batch_size, n_process=n_process))
+    elapsed = time.perf_counter() - start
+    return {'sentences_per_sec': count / elapsed if elapsed else 0.0, 'batch_size': batch_size, 'n_process': n_process}
+
+
+def normalize(text: str) -> str:
+    return ' '.join(text.casefold().split())
+
+
+def evaluate_quality(references: Dict[str, List[str]]) -> Dict:
+    """
+    Compares the rule-based suggestions with the reference rewrites.
+
+    Reports the share of sentences the rules changed, the share matching a reference exactly
+    (ignoring case and whitespace) and the mean similarity to the closest reference.
+    """
+    sources = list(references)
+    exact = 0
+    changed = 0
+    similarity = 0.0
+    for source, result in zip(sources, rewrite_many(sources)):
+        candidates = [normalize(reference) for reference in references[source]]
+        suggestion = normalize(result.suggestion)
+        changed += suggestion != normalize(source)
+        exact += suggestion in candidates
+        similarity += max(difflib.SequenceMatcher(None, suggestion, candidate).ratio() for candidate in candidates)
+    return {
+        'sentences': len(sources),
+        'changed_rate': changed / len(sources),
+        'exact_match_rate': exact / len(sources),
+        'mean_similarity': similarity / len(sources),
+    }
+
+
+def settings_mismatches(report: Dict, baseline: Dict) -> List[str]:
+    """
+    Returns the settings of report that differ from baseline, which make the measurements not comparable.
+    """
+    settings = [
+        ('model', report.get('model'), baseline.get('model')),
+        ('sentences', report.get('sentences'), baseline.get('sentences')),
+        ('trigger_words', report.get('trigger_words'), baseline.get('trigger_words')),
+        ('batch.batch_size', report['batch'].get('batch_size'), baseline.get('batch', {}).get('batch_size')),
+        ('batch.n_process', report['batch'].get('n_process'), baseline.get('batch', {}).get('n_process')),
+    ]
+    return [f'{name}: {value} != baseline {reference}' for name, value, reference in settings if value != reference]
+
+
+def compare_with_baseline(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Returns the regressions of report with respect to baseline: lower throughput or quality,
+    higher latency, beyond the relative tolerance.
+    """
+    regressions = []
+    checks = [
+        ('single.sentences_per_sec', report['single']['sentences_per_sec'], baseline['single']['sentences_per_sec'], True),
+        ('single.p95_ms', report['single']['p95_ms'], baseline['single']['p95_ms'], False),
+        ('batch.sentences_per_sec', report['batch']['sentences_per_sec'], baseline['batch']['sentences_per_sec'], True),
+        ('quality.exact_match_rate', report['quality']['exact_match_rate'], baseline['quality']['exact_match_rate'], True),
+        ('quality.mean_similarity', report['quality']['mean_similarity'], baseline['quality']['mean_similarity'], True),
+    ]
+    for name, value, reference, higher_is_better in checks:
+        if higher_is_better and value < reference * (1 - tolerance):
+            regressions.append(f'{name}: {value:.4g} < baseline {reference:.4g}')
+        if not higher_is_better and value > reference * (1 + tolerance):
+            regressions.append(f'{name}: {value:.4g} > baseline {reference:.4g}')
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=_spacy.DEFAULT_MODEL, help='spaCy model to benchmark')
+    parser.add_argument('--sentences', type=int, default=None,
+                        help='scale the corpus to this number of sentences (default: the corpus as it is)')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--n-process', type=int, default=1)
+    parser.add_argument('--output', help='write the report to this JSON file')
+    parser.add_argument('--baseline', help='compare with this baseline JSON report')
+    parser.add_argument('--save-baseline', help='write the report as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='relative tolerance of the baseline comparison')
+    args = parser.parse_args(argv)
+
+    _spacy.set_model(args.model)
+    nlp = _spacy.get_nlp()
+    lexicon = TriggerLexicon.from_csv()
+    sentences = load_sentences()
+    if args.sentences:
+        sentences = scale(sentences, args.sentences)
+
+    # Warm-up, so that the first measurements do not include lazy initialisations
+    for sentence in sentences[:10]:
+        nlp(sentence)
+
+    report = {
+        'model': '{}-{}'.format(nlp.meta.get('name'), nlp.meta.get('version')),
+        'pipeline': nlp.pipe_names,
+        'trigger_words': len(lexicon),
+        'sentences': len(sentences),
+        'single': bench_stages(sentences, lexicon),
+        'batch': bench_batch(sentences, args.batch_size, args.n_process),
+        'quality': evaluate_quality(load_references()),
+    }
+    report['peak_rss_mb'] = peak_rss_mb()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            file.write(output)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        mismatches = settings_mismatches(report, baseline)
+        if mismatches:
+            for mismatch in mismatches:
+                print('NOT COMPARABLE ' + mismatch, file=sys.stderr)
+            return 2
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+from collections import Counter
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from rule_based_approach.cache import ParseCache
+from rule_based_approach.pipeline import RewriteResult, rewrite_many
+
+from .paraphraser import Paraphraser
+
+
+class CascadeResult(NamedTuple):
+    """
+    Result of the cascade for one sentence.
+
+    Attributes:
+    sentence (str): The original sentence.
+    suggestion (str): The suggested sentence.
+    path (str): What served the sentence: 'unchanged' (nothing to modify), 'rules' or 'neural'.
+    unresolved_nouns (List[str]): The nouns the rules could not handle, which sent the sentence to the neural model.
+    """
+    sentence: str
+    suggestion: str
+    path: str
+    unresolved_nouns: List[str]
+
+
+class Cascade:
+    """
+    Rule-based rewriting first, mT5 paraphrasing only for the sentences the rules cannot fully resolve.
+
+    Every sentence goes through the rule-based pipeline. Its output is accepted when all the
+    nouns to be made gender-inclusive were handled by a known article/adjective pattern;
+    otherwise (e.g. a determiner outside the articles/adjectives tables, or an agreeing
+    adjective such as "il candidato stesso") the original sentence is sent to the paraphraser.
+    Those sentences are paraphrased in batches, and results are yielded in input order: at most
+    batch_size * neural_batch_size results are held back waiting for a neural batch.
+
+    Parameters:
+    paraphraser (Paraphraser): The neural model. It is only called for residual sentences.
+    neural_batch_size (int): Number of residual sentences paraphrased together.
+                             Defaults to the batch size of the paraphraser.
+
+    Attributes:
+    paths (Counter): Number of sentences served by each path, over all the calls.
+    """
+
+    def __init__(self, paraphraser: Paraphraser, neural_batch_size: Optional[int] = None):
+        self.paraphraser = paraphraser
+        self.neural_batch_size = neural_batch_size or paraphraser.batch_size
+        self.paths = Counter()
+
+    def rewrite_many(self, sentences: Iterable[str], batch_size: int = 64, n_process: int = 1,
+                     cache: Optional[ParseCache] = None) -> Iterator[CascadeResult]:
+        """
+        Runs the cascade on a stream of sentences.
+
+        Parameters:
+        sentences (Iterable[str]): The sentences to be made gender-inclusive.
+        batch_size (int): Number of sentences parsed together by nlp.pipe.
+        n_process (int): Number of processes used by nlp.pipe.
+        cache (ParseCache): Optional cache of parsed sentences.
+
+        Returns:
+        Iterator[CascadeResult]: One result per input sentence, in input order.
+        """
+        # Results not yielded yet, in input order: None for the sentences waiting for the paraphraser
+        pending = []
+        residual = []  # (position in pending, rule-based result)
+        # When residual sentences are rare, a partial neural batch is sent anyway after this many
+        # sentences, so that results keep flowing and memory stays bounded
+        max_pending = batch_size * self.neural_batch_size
+
+        for result in rewrite_many(sentences, batch_size=batch_size, n_process=n_process, cache=cache):
+            if result.unresolved_nouns:
+                residual.append((len(pending), result))
+                pending.append(None)
+            elif pending:
+                pending.append(self._from_rules(result))
+            else:
+                yield self._from_rules(result)
+                continue
+            if len(residual) >= self.neural_batch_size or len(pending) >= max_pending:
+                yield from self._flush(pending, residual)
+                pending, residual = [], []
+
+        yield from self._flush(pending, residual)
+
+    def _from_rules(self, result: RewriteResult) -> CascadeResult:
+        path = 'rules' if result.edits else 'unchanged'
+        self.paths[path] += 1
+        return CascadeResult(result.sentence, result.suggestion, path, [])
+
+    def _flush(self, pending: List[Optional[CascadeResult]], residual: List) -> Iterator[CascadeResult]:
+        paraphrases = self.paraphraser.paraphrase([result.sentence for _, result in residual])
+        for (position, result), paraphrase in zip(residual, paraphrases):
+            pending[position] = CascadeResult(result.sentence, paraphrase, 'neural', result.unresolved_nouns)
+            self.paths['neural'] += 1
+        yield from pending
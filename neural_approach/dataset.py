@@ -0,0 +1,251 @@
+import array
+import hashlib
+import json
+import os
+import random
+import shutil
+import tempfile
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import Dataset, Sampler
+
+# Column pairs recognised when none are given: the notebook's training/validation files and the bundled dataset
+COLUMN_PAIRS = (('source', 'target'), ('sentence1', 'sentence2'))
+
+# Bump when the layout of the cache changes
+CACHE_VERSION = 1
+
+# Texts are built as the fine-tuning notebook (notebooks/mt5_base_it_paraphraser.ipynb) always built them,
+# so that models fine-tuned before and after the token cache see the same ids
+SOURCE_FORMAT = 'paraphrase: {} </s>'
+TARGET_FORMAT = '{} </s>'
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _resolve_columns(columns: Sequence[str], source_column: Optional[str], target_column: Optional[str]):
+    if source_column and target_column:
+        return source_column, target_column
+    for source, target in COLUMN_PAIRS:
+        if source in columns and target in columns:
+            return source, target
+    raise ValueError(f"Cannot find the source and target columns among {list(columns)}, pass them explicitly")
+
+
+def cache_key(csv_path: str, tokenizer, max_len: int, source_column: str, target_column: str) -> str:
+    """
+    Key of the cached arrays: it changes with the content of the CSV file, the tokenizer, max_len and the columns.
+
+    The tokenizer is identified by its class, name or path and vocabulary size.
+    """
+    identity = [CACHE_VERSION, type(tokenizer).__name__, tokenizer.name_or_path, len(tokenizer), max_len,
+                source_column, target_column, SOURCE_FORMAT, TARGET_FORMAT, _file_digest(csv_path)]
+    return hashlib.sha1(json.dumps(identity).encode('utf-8')).hexdigest()[:16]
+
+
+def _tokenize(tokenizer, texts: List[str], max_len: int, chunk_size: int):
+    """
+    Tokenizes the texts in chunks into flat int32 ids and int64 offsets: the ids of text i are ids[offsets[i]:offsets[i + 1]].
+    """
+    ids = array.array('i')
+    offsets = array.array('q', [0])
+    for start in range(0, len(texts), chunk_size):
+        encoded = tokenizer(texts[start:start + chunk_size], truncation=True, max_length=max_len)['input_ids']
+        for text_ids in encoded:
+            ids.extend(text_ids)
+            offsets.append(len(ids))
+    return np.frombuffer(ids, dtype=np.int32), np.frombuffer(offsets, dtype=np.int64)
+
+
+def build_token_cache(csv_path: str, tokenizer, max_len: int = 256, cache_dir: str = 'data/token_cache',
+                      source_column: Optional[str] = None, target_column: Optional[str] = None,
+                      delimiter: str = ';', chunk_size: int = 1000) -> str:
+    """
+    Tokenizes the sentence pairs of a CSV file once and stores the token ids in .npy files, to be memory-mapped.
+
+    Nothing is done if the cache for the same file, tokenizer and max_len already exists.
+    The directory is written under a temporary name and renamed when complete, so an interrupted
+    build never leaves a partial cache.
+
+    Parameters:
+    csv_path (str): CSV file with the sentence pairs, e.g. data/inclusive_rewriting_dataset.csv.
+    tokenizer: The Hugging Face tokenizer of the model.
+    max_len (int): Maximum length in tokens; longer sentences are truncated.
+    cache_dir (str): Directory of the caches.
+    source_column (str): Column of the source sentences. Defaults to "source", or "sentence1".
+    target_column (str): Column of the target sentences. Defaults to "target", or "sentence2".
+    delimiter (str): Delimiter of the CSV file.
+    chunk_size (int): Number of sentences tokenized together.
+
+    Returns:
+    str: The directory of the cache.
+    """
+    # Only the header is read to find the columns: the whole file is read only if the cache has to be built
+    columns = pd.read_csv(csv_path, delimiter=delimiter, nrows=0).columns
+    source_column, target_column = _resolve_columns(columns, source_column, target_column)
+    directory = os.path.join(cache_dir, '{}-{}'.format(os.path.splitext(os.path.basename(csv_path))[0],
+                                                       cache_key(csv_path, tokenizer, max_len, source_column, target_column)))
+    if os.path.exists(os.path.join(directory, 'meta.json')):
+        return directory
+
+    data = pd.read_csv(csv_path, delimiter=delimiter, usecols=[source_column, target_column]).dropna()
+    sources = [SOURCE_FORMAT.format(source) for source in data[source_column]]
+    targets = [TARGET_FORMAT.format(target) for target in data[target_column]]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary_directory = tempfile.mkdtemp(dir=cache_dir, suffix='.tmp')
+    try:
+        for name, texts in (('source', sources), ('target', targets)):
+            ids, offsets = _tokenize(tokenizer, texts, max_len, chunk_size)
+            np.save(os.path.join(temporary_directory, name + '_ids.npy'), ids)
+            np.save(os.path.join(temporary_directory, name + '_offsets.npy'), offsets)
+        with open(os.path.join(temporary_directory, 'meta.json'), 'w') as file:
+            json.dump({'csv_path': csv_path, 'tokenizer': tokenizer.name_or_path, 'max_len': max_len,
+                       'pad_token_id': tokenizer.pad_token_id, 'size': len(sources)}, file)
+        os.replace(temporary_directory, directory)
+    except OSError:
+        # Built meanwhile by another process
+        if not os.path.exists(os.path.join(directory, 'meta.json')):
+            raise
+    finally:
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+    return directory
+
+
+class TokenizedParaphraseDataset(Dataset):
+    """
+    Sentence pairs of a cache written by build_token_cache, memory-mapped.
+
+    Items are not padded: use PadCollator to pad each batch to its longest sentence, and
+    LengthBucketSampler to group sentences of similar length.
+
+    Parameters:
+    directory (str): Directory of the cache.
+    """
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, 'meta.json')) as file:
+            self.meta = json.load(file)
+        self.source_ids = np.load(os.path.join(directory, 'source_ids.npy'), mmap_mode='r')
+        self.source_offsets = np.load(os.path.join(directory, 'source_offsets.npy'), mmap_mode='r')
+        self.target_ids = np.load(os.path.join(directory, 'target_ids.npy'), mmap_mode='r')
+        self.target_offsets = np.load(os.path.join(directory, 'target_offsets.npy'), mmap_mode='r')
+
+    @classmethod
+    def from_csv(cls, csv_path: str, tokenizer, max_len: int = 256, cache_dir: str = 'data/token_cache', **kwargs):
+        """
+        Builds the cache of the CSV file if needed and opens it. Keyword arguments are passed to build_token_cache.
+        """
+        return cls(build_token_cache(csv_path, tokenizer, max_len, cache_dir, **kwargs))
+
+    @property
+    def pad_token_id(self) -> int:
+        return self.meta['pad_token_id']
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """
+        Length in tokens of each pair: the longest of source and target.
+        """
+        return np.maximum(np.diff(self.source_offsets), np.diff(self.target_offsets))
+
+    def __len__(self):
+        return len(self.source_offsets) - 1
+
+    def __getitem__(self, index: int) -> Dict[str, torch.Tensor]:
+        source = self.source_ids[self.source_offsets[index]:self.source_offsets[index + 1]]
+        target = self.target_ids[self.target_offsets[index]:self.target_offsets[index + 1]]
+        return {'source_ids': torch.from_numpy(source.astype(np.int64)),
+                'target_ids': torch.from_numpy(target.astype(np.int64))}
+
+
+class PadCollator:
+    """
+    Collate function padding a batch to its longest source and target, with the keys used by T5FineTuner._step.
+
+    Parameters:
+    pad_token_id (int): Id of the padding token.
+    """
+
+    def __init__(self, pad_token_id: int):
+        self.pad_token_id = pad_token_id
+
+    def _pad(self, sequences: List[torch.Tensor]):
+        ids = torch.full((len(sequences), max(len(sequence) for sequence in sequences)), self.pad_token_id, dtype=torch.long)
+        mask = torch.zeros(ids.shape, dtype=torch.long)
+        for row, sequence in enumerate(sequences):
+            ids[row, :len(sequence)] = sequence
+            mask[row, :len(sequence)] = 1
+        return ids, mask
+
+    def __call__(self, items: List[Dict[str, torch.Tensor]]) -> Dict[str, torch.Tensor]:
+        source_ids, source_mask = self._pad([item['source_ids'] for item in items])
+        target_ids, target_mask = self._pad([item['target_ids'] for item in items])
+        return {'source_ids': source_ids, 'source_mask': source_mask, 'target_ids': target_ids, 'target_mask': target_mask}
+
+
+class LengthBucketSampler(Sampler):
+    """
+    Batch sampler grouping sentences of similar length, so that little padding is needed.
+
+    Each epoch, the indices are shuffled and split into buckets of batch_size * bucket_batches
+    sentences; each bucket is sorted by length and cut into batches, and the batches are shuffled.
+    Pass it as batch_sampler to a DataLoader.
+
+    Parameters:
+    lengths (Sequence[int]): Length of each item, e.g. TokenizedParaphraseDataset.lengths.
+    batch_size (int): Number of items per batch.
+    bucket_batches (int): Number of batches per bucket. Larger buckets give less padding but less randomness.
+    shuffle (bool): Whether to shuffle. If False, the batches follow the order of the lengths.
+    drop_last (bool): Whether to drop the batches smaller than batch_size.
+    seed (int): Seed of the shuffling, combined with the epoch set with set_epoch.
+    """
+
+    def __init__(self, lengths: Sequence[int], batch_size: int, bucket_batches: int = 50, shuffle: bool = True,
+                 drop_last: bool = False, seed: int = 42):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.bucket_batches = bucket_batches
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[List[int]]:
+        rng = random.Random(self.seed + self.epoch)
+        self.epoch += 1
+        indices = list(range(len(self.lengths)))
+        if self.shuffle:
+            rng.shuffle(indices)
+        else:
+            indices.sort(key=lambda i: self.lengths[i])
+
+        batches = []
+        bucket_size = self.batch_size * self.bucket_batches
+        for start in range(0, len(indices), bucket_size):
+            bucket = sorted(indices[start:start + bucket_size], key=lambda i: self.lengths[i])
+            for batch_start in range(0, len(bucket), self.batch_size):
+                batches.append(bucket[batch_start:batch_start + self.batch_size])
+        if self.drop_last:
+            batches = [batch for batch in batches if len(batch) == self.batch_size]
+        if self.shuffle:
+            rng.shuffle(batches)
+        return iter(batches)
+
+    def __len__(self):
+        # Every bucket but the last has bucket_batches full batches
+        full_buckets, rest = divmod(len(self.lengths), self.batch_size * self.bucket_batches)
+        last_batches = rest // self.batch_size if self.drop_last else -(-rest // self.batch_size)
+        return full_buckets * self.bucket_batches + last_batches
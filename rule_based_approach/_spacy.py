@@ -1,16 +1,94 @@
+import os
+import threading
 import spacy
+from spacy.language import Language
+from typing import Dict, Iterable, Optional, Tuple
+
+from . import metrics
+from .component import DETECTOR_NAME
+
+# Model loaded when none is given. Smaller models ("it_core_news_sm", "it_core_news_md") can be
+# selected with set_model or with the ITA_GENDER_SPACY_MODEL environment variable.
+# First you need to install the model, e.g. with the following command: python3 -m spacy download it_core_news_lg
+DEFAULT_MODEL = os.environ.get('ITA_GENDER_SPACY_MODEL', 'it_core_news_lg')
+
+# Components excluded by default: the rules only read pos_, tag_, morph, dep_ and head/children
+DEFAULT_EXCLUDE = ('ner', 'lemmatizer')
+
+_model = DEFAULT_MODEL
+_exclude = DEFAULT_EXCLUDE
+_pipelines: Dict[Tuple[str, Tuple[str, ...]], Language] = {}
+_lock = threading.Lock()
+
+
+def load_model(model: Optional[str] = None, exclude: Optional[Iterable[str]] = None) -> Language:
+    """
+    Load a spaCy pipeline, or return it if it was already loaded.
+
+    Pipelines are loaded once per process and shared: concurrent calls from several threads
+    wait for the same load and get the same object. Call it before forking worker processes
+    to share the loaded model between them.
+
+    Parameters:
+    model (str): Name or path of the spaCy model. Defaults to the model selected with set_model.
+    exclude (Iterable[str]): Pipeline components not to load. Defaults to the ones selected with set_model.
+
+    Returns:
+    Language: The loaded spaCy pipeline.
+    """
+    key = (model or _model, tuple(_exclude if exclude is None else exclude))
+    nlp = _pipelines.get(key)
+    if nlp is None:
+        with _lock:
+            nlp = _pipelines.get(key)
+            if nlp is None:
+                nlp = spacy.load(key[0], exclude=list(key[1]))
+                _pipelines[key] = nlp
+    return nlp
+
+
+def set_model(model: str, exclude: Iterable[str] = DEFAULT_EXCLUDE):
+    """
+    Select the spaCy model used by spacify and by the batch functions. The model is loaded on first use.
+
+    Parameters:
+    model (str): Name or path of the spaCy model, e.g. "it_core_news_sm".
+    exclude (Iterable[str]): Pipeline components not to load.
+    """
+    global _model, _exclude
+    with _lock:
+        _model = model
+        _exclude = tuple(exclude)
+
+
+def get_nlp() -> Language:
+    """
+    Return the selected spaCy pipeline, loading it on first use.
+    """
+    return load_model()
 
-nlp = spacy.load("it_core_news_lg") #first you need to install "it_core_news_lg" with the following command: python3 -m spacy download it_core_news_lg
 
 def spacify(text: str) -> spacy.tokens.doc.Doc:
     """
     Process the given text using the spaCy model and return the processed Doc object.
 
+    The gender_inclusive_detector component is not run, even when rewrite_many added it to the pipeline:
+    the rules are applied to the returned Doc by the caller.
+
     Parameters:
     text (str): The text to be processed.
 
     Returns:
     spacy.tokens.doc.Doc: The processed Doc object containing linguistic annotations.
     """
-    return nlp(text)
+    with metrics.timer('parse'):
+        doc = get_nlp()(text, disable=[DETECTOR_NAME])
+    metrics.observe('sentence_length_tokens', len(doc))
+    return doc
+
 
+def __getattr__(name):
+    # Keeps "from rule_based_approach._spacy import nlp" working, loading the model only when it is asked for
+    if name == 'nlp':
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
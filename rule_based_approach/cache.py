@@ -0,0 +1,221 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from spacy.language import Language
+from spacy.tokens import Doc, DocBin
+from typing import Any, Optional
+
+from . import metrics
+from .component import DETECTOR_NAME
+
+# Age in seconds after which a temporary file is left over by an interrupted write, and not a write in progress
+STALE_TEMPORARY_AGE = 3600
+
+
+def normalize(text: str) -> str:
+    """
+    Normalization applied to sentences before hashing them (Unicode NFC).
+    """
+    return unicodedata.normalize('NFC', text)
+
+
+class ParseCache:
+    """
+    Persistent cache of parsed sentences, with an in-memory front tier for final results.
+
+    Each parsed Doc is stored on disk as a DocBin file named after the hash of the normalized
+    sentence, the model name and version and the loaded components, so upgrading the model
+    never returns stale parses. Files are spread over 256 subdirectories and written atomically
+    (temporary file + rename), so several processes can read and write the same directory at
+    the same time. When the number of files goes over max_entries, the least recently used ones
+    are removed by a background thread: the modification time of a file is updated every time it is read.
+    The files already in the directory are also counted by a background thread, so opening a large cache is fast.
+
+    The front tier keeps the last memory_size final results (e.g. pipeline.RewriteResult) in memory,
+    per model, so that repeated sentences skip the rules as well as parsing.
+
+    Attributes:
+    hits (int): Number of parses found on disk.
+    misses (int): Number of parses not found on disk.
+    result_hits (int): Number of results found in memory.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 1000000, memory_size: int = 10000):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.memory_size = memory_size
+        self.hits = 0
+        self.misses = 0
+        self.result_hits = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_ids = {}
+        os.makedirs(directory, exist_ok=True)
+        # No eviction starts before the existing files are counted
+        self._entries = 0
+        self._evicting = True
+        threading.Thread(target=self._count_in_background, daemon=True).start()
+
+    def _files(self, suffix: str = '.spacy'):
+        for subdirectory in os.scandir(self.directory):
+            if subdirectory.is_dir():
+                for entry in os.scandir(subdirectory.path):
+                    if entry.name.endswith(suffix):
+                        yield entry
+
+    def _count_in_background(self):
+        try:
+            count = sum(1 for _ in self._files())
+            with self._lock:
+                # Files written meanwhile were counted by put, and may be counted twice: evict counts them exactly
+                self._entries += count
+                evict = self._entries > self.max_entries
+            if evict:
+                self.evict()
+        finally:
+            with self._lock:
+                self._evicting = False
+
+    def _model_id(self, nlp: Language) -> str:
+        model_id = self._model_ids.get(id(nlp))
+        if model_id is None:
+            # Components added to the pipeline after parsing, such as the detector, do not change the parse
+            components = [name for name in nlp.pipe_names if name != DETECTOR_NAME]
+            model_id = '{}_{}-{}:{}'.format(nlp.meta.get('lang'), nlp.meta.get('name'), nlp.meta.get('version'), ','.join(components))
+            self._model_ids[id(nlp)] = model_id
+        return model_id
+
+    def _path(self, text: str, nlp: Language) -> str:
+        key = hashlib.sha1((self._model_id(nlp) + '\n' + normalize(text)).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key + '.spacy')
+
+    def get(self, text: str, nlp: Language) -> Optional[Doc]:
+        """
+        Returns the cached parse of the sentence, or None.
+
+        Parameters:
+        text (str): The sentence.
+        nlp (Language): The spaCy pipeline that would parse the sentence.
+
+        Returns:
+        Optional[Doc]: The parsed sentence, without the annotations of the detector.
+        """
+        path = self._path(text, nlp)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            self.misses += 1
+            metrics.incr('cache_misses', tier='disk')
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        doc = next(DocBin().from_bytes(data).get_docs(nlp.vocab))
+        if doc.text != text:
+            # Same normalized sentence, different original text: parse it again to keep offsets exact
+            self.misses += 1
+            metrics.incr('cache_misses', tier='disk')
+            return None
+        self.hits += 1
+        metrics.incr('cache_hits', tier='disk')
+        return doc
+
+    def put(self, text: str, doc: Doc, nlp: Language):
+        """
+        Stores the parse of the sentence.
+
+        Parameters:
+        text (str): The sentence.
+        doc (Doc): The parsed sentence.
+        nlp (Language): The spaCy pipeline that parsed the sentence.
+        """
+        path = self._path(text, nlp)
+        doc_bin = DocBin(store_user_data=False)
+        doc_bin.add(doc)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(file_descriptor, 'wb') as file:
+            file.write(doc_bin.to_bytes())
+        # Overwritten files, e.g. written meanwhile by another process, are not new entries
+        is_new = not os.path.exists(path)
+        os.replace(temporary_path, path)
+        if not is_new:
+            return
+        with self._lock:
+            self._entries += 1
+            evict = self._entries > self.max_entries and not self._evicting
+            if evict:
+                self._evicting = True
+        if evict:
+            # Scanning the directory is slow, so it is not done while parsing
+            threading.Thread(target=self._evict_in_background, daemon=True).start()
+
+    def _evict_in_background(self):
+        try:
+            self.evict()
+        finally:
+            with self._lock:
+                self._evicting = False
+
+    def evict(self):
+        """
+        Removes the least recently used files, down to 90% of max_entries, and the temporary files
+        left over by interrupted writes.
+        """
+        stale = time.time() - STALE_TEMPORARY_AGE
+        for entry in self._files('.tmp'):
+            try:
+                if entry.stat().st_mtime < stale:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+        entries = []
+        for entry in self._files():
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                pass
+        entries.sort()
+        to_remove = max(0, len(entries) - int(self.max_entries * 0.9))
+        for _, path in entries[:to_remove]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Already removed by another process
+                pass
+        with self._lock:
+            self._entries = len(entries) - to_remove
+
+    def get_result(self, text: str, nlp: Language) -> Optional[Any]:
+        """
+        Returns the final result memoized for the sentence and the spaCy pipeline, or None.
+        """
+        key = (self._model_id(nlp), text)
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.result_hits += 1
+        metrics.incr('cache_hits' if result is not None else 'cache_misses', tier='memory')
+        return result
+
+    def put_result(self, text: str, result: Any, nlp: Language):
+        """
+        Memoizes the final result for the sentence and the spaCy pipeline, forgetting the least recently used one
+        if the front tier is full.
+        """
+        if self.memory_size <= 0:
+            return
+        key = (self._model_id(nlp), text)
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            if len(self._results) > self.memory_size:
+                self._results.popitem(last=False)
@@ -0,0 +1,100 @@
+import threading
+from spacy.language import Language
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import Doc
+from typing import Dict, List, Optional
+
+from . import metrics
+from .gender_mappings import articles as default_articles, adjectives as default_adjectives
+from .trigger_lexicon import TRIGGER_WORDS_PATH, TriggerLexicon
+from .utils import Edit, find_unresolved_nouns, identify_nouns_to_modify, suggest_edits_skipping_doubled
+
+# Results of the detector. Only plain values are stored, so that they are kept when Docs are
+# sent between processes by nlp.pipe or saved in a DocBin with store_user_data=True.
+# Token indices of the nouns to be made gender-inclusive
+Doc.set_extension('gendered_nouns', default=None, force=True)
+# Token indices of the trigger nouns already paired with their feminine form, e.g. "candidata e candidato"
+Doc.set_extension('paired_forms', default=None, force=True)
+# Token indices of the nouns that the rules could not make fully gender-inclusive
+Doc.set_extension('unresolved_nouns', default=None, force=True)
+# Edits as (start, end, original, replacement, rule) tuples, see utils.Edit
+Doc.set_extension('suggested_edits', default=None, force=True)
+
+DETECTOR_NAME = 'gender_inclusive_detector'
+
+_lock = threading.Lock()
+
+
+class GenderInclusiveDetector:
+    """
+    spaCy pipeline component running the rules on each parsed Doc.
+
+    Trigger words are matched with a PhraseMatcher on the LOWER attribute, then the same
+    filtering and rewriting rules of rule_based_approach.utils are applied, and the results
+    are stored in Doc._.gendered_nouns, Doc._.paired_forms, Doc._.unresolved_nouns and Doc._.suggested_edits.
+    It must be placed after the components setting pos_, tag_, morph and dep_.
+    """
+
+    def __init__(self, nlp: Language, lexicon: TriggerLexicon, articles: Optional[Dict] = None, adjectives: Optional[Dict] = None):
+        self.lexicon = lexicon
+        self.articles = default_articles if articles is None else articles
+        self.adjectives = default_adjectives if adjectives is None else adjectives
+        self.matcher = PhraseMatcher(nlp.vocab, attr='LOWER')
+        self.matcher.add('TRIGGER', list(nlp.tokenizer.pipe(lexicon.masculine_forms())))
+
+    def __call__(self, doc: Doc) -> Doc:
+        # Single-token matches on a NOUN or PROPN, as in find_initial_nouns
+        initial_nouns = []
+        with metrics.timer('find_initial_nouns'):
+            for _, start, end in sorted(self.matcher(doc), key=lambda match: match[1]):
+                if end - start == 1 and (doc[start].pos_ == "NOUN" or doc[start].pos_ == "PROPN"):
+                    initial_nouns.append((doc[start], start))
+        metrics.incr('triggers_found', len(initial_nouns))
+
+        nouns_to_modify = identify_nouns_to_modify(word_list=initial_nouns, trigger_words=self.lexicon, verbose=False)
+        nouns_to_modify, edits = suggest_edits_skipping_doubled(doc, nouns_to_modify, self.lexicon, self.articles,
+                                                                self.adjectives)
+
+        doc._.gendered_nouns = [word[1] for word in nouns_to_modify]
+        doc._.paired_forms = [word[1] for word in initial_nouns if word not in nouns_to_modify]
+        doc._.unresolved_nouns = [word[1] for word in find_unresolved_nouns(nouns_to_modify, edits, self.lexicon)]
+        doc._.suggested_edits = [tuple(edit) for edit in edits]
+        return doc
+
+
+@Language.factory(
+    DETECTOR_NAME,
+    default_config={'trigger_words_path': None},
+    requires=['token.pos', 'token.tag', 'token.morph', 'token.dep'],
+    assigns=['doc._.gendered_nouns', 'doc._.paired_forms', 'doc._.unresolved_nouns', 'doc._.suggested_edits'],
+)
+def create_gender_inclusive_detector(nlp: Language, name: str, trigger_words_path: Optional[str]) -> GenderInclusiveDetector:
+    """
+    Creates the detector from a trigger words CSV file (data/trigger_words.csv by default)
+    and the articles and adjectives of gender_mappings.
+    """
+    return GenderInclusiveDetector(nlp, TriggerLexicon.from_csv(trigger_words_path or TRIGGER_WORDS_PATH))
+
+
+def add_detector(nlp: Language, trigger_words_path: Optional[str] = None) -> Language:
+    """
+    Adds the detector at the end of the pipeline, if it is not there yet.
+
+    Parameters:
+    nlp (Language): The spaCy pipeline, e.g. the one returned by _spacy.get_nlp.
+    trigger_words_path (str): Path of the trigger words CSV file. Defaults to data/trigger_words.csv.
+
+    Returns:
+    Language: The same pipeline.
+    """
+    with _lock:
+        if DETECTOR_NAME not in nlp.pipe_names:
+            nlp.add_pipe(DETECTOR_NAME, last=True, config={'trigger_words_path': trigger_words_path})
+    return nlp
+
+
+def get_edits(doc: Doc) -> List[Edit]:
+    """
+    Returns the edits suggested by the detector as Edit tuples, also for Docs received from other processes or loaded from a DocBin.
+    """
+    return [Edit(*edit) for edit in doc._.suggested_edits or []]
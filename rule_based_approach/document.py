@@ -0,0 +1,152 @@
+import re
+import threading
+from collections import deque
+import spacy
+from spacy.language import Language
+from typing import IO, Iterator, List, Optional, Tuple
+
+from .cache import ParseCache
+from .pipeline import rewrite_many
+from .utils import Edit
+
+# Blank line between two paragraphs: sentences never cross it
+_PARAGRAPH_BREAK = re.compile(r'\r?\n[ \t]*\r?\n')
+
+_sentencizer = None
+_lock = threading.Lock()
+
+
+def get_sentencizer() -> Language:
+    """
+    Return a blank Italian pipeline with the rule-based sentencizer, used to split documents into sentences.
+    It does not need any trained model.
+    """
+    global _sentencizer
+    if _sentencizer is None:
+        with _lock:
+            if _sentencizer is None:
+                nlp = spacy.blank('it')
+                nlp.add_pipe('sentencizer')
+                _sentencizer = nlp
+    return _sentencizer
+
+
+def split_paragraphs(text: str) -> List[Tuple[int, str]]:
+    """
+    Splits text into paragraphs separated by blank lines.
+
+    Parameters:
+    text (str): The text.
+
+    Returns:
+    List[Tuple[int, str]]: (start, paragraph) pairs, where start is the character offset of the paragraph in text.
+    """
+    paragraphs = []
+    position = 0
+    for match in _PARAGRAPH_BREAK.finditer(text):
+        paragraphs.append((position, text[position:match.start()]))
+        position = match.end()
+    paragraphs.append((position, text[position:]))
+    return paragraphs
+
+
+def split_sentences(text: str, offset: int = 0) -> Iterator[Tuple[int, str]]:
+    """
+    Splits text into paragraphs and then into sentences.
+
+    Parameters:
+    text (str): The text.
+    offset (int): Offset of text in the document, added to the sentence offsets.
+
+    Returns:
+    Iterator[Tuple[int, str]]: (start, sentence) pairs, where start is the character offset of the sentence in the document.
+    """
+    paragraphs = split_paragraphs(text)
+    paragraph_docs = get_sentencizer().pipe(paragraph for _, paragraph in paragraphs)
+    for (start, _), doc in zip(paragraphs, paragraph_docs):
+        for sentence in doc.sents:
+            # Whitespace tokens at the edges of the sentence, e.g. line breaks, are not part of it
+            sentence_text = sentence.text.lstrip()
+            leading = len(sentence.text) - len(sentence_text)
+            sentence_text = sentence_text.rstrip()
+            if sentence_text:
+                yield offset + start + sentence.start_char + leading, sentence_text
+
+
+def iter_sentences(file: IO[str], chunk_size: int = 65536) -> Iterator[Tuple[int, str]]:
+    """
+    Reads a text file incrementally and yields its sentences with their offsets.
+
+    The file is read in chunks and only complete paragraphs are split into sentences, so
+    memory depends on the chunk size and not on the length of the document. A paragraph
+    longer than four chunks is split into sentences anyway, keeping its last sentence for the
+    next chunk.
+
+    Parameters:
+    file (IO[str]): The document, opened in text mode with newline='' so that offsets match the file content.
+    chunk_size (int): Number of characters read at a time.
+
+    Returns:
+    Iterator[Tuple[int, str]]: (start, sentence) pairs, where start is the character offset of the sentence in the document.
+    """
+    offset = 0  # Offset of buffer[0] in the document
+    buffer = ''
+    while True:
+        chunk = file.read(chunk_size)
+        buffer += chunk
+        if not chunk:
+            # End of the document: the rest of the buffer is complete
+            yield from split_sentences(buffer, offset)
+            return
+
+        breaks = list(_PARAGRAPH_BREAK.finditer(buffer))
+        if breaks:
+            cut = breaks[-1].end()
+            yield from split_sentences(buffer[:cut], offset)
+        elif len(buffer) >= 4 * chunk_size:
+            sentences = list(split_sentences(buffer, offset))
+            if len(sentences) > 1:
+                yield from sentences[:-1]
+                cut = sentences[-1][0] - offset
+            else:
+                # No sentence boundary at all: give up on waiting for it
+                yield from sentences
+                cut = len(buffer)
+        else:
+            continue
+        buffer = buffer[cut:]
+        offset += cut
+
+
+def rewrite_document(path: str, encoding: str = 'utf-8', chunk_size: int = 65536, batch_size: int = 64,
+                     n_process: int = 1, cache: Optional[ParseCache] = None) -> Iterator[Edit]:
+    """
+    Runs the rule-based pipeline on a whole document and yields the suggested edits in document order.
+
+    The document is streamed: it is read incrementally, split into sentences and parsed in
+    batches with rewrite_many, so it is never held in memory as a whole.
+
+    Parameters:
+    path (str): Path of the text file.
+    encoding (str): Encoding of the file.
+    chunk_size (int): Number of characters read at a time.
+    batch_size (int): Number of sentences parsed together by nlp.pipe.
+    n_process (int): Number of processes used by nlp.pipe.
+    cache (ParseCache): Optional cache of parsed sentences.
+
+    Returns:
+    Iterator[Edit]: The edits, with start and end as absolute character offsets in the file.
+    """
+    with open(path, encoding=encoding, newline='') as file:
+        # Start offsets of the sentences sent to rewrite_many and not processed yet
+        starts = deque()
+
+        def sentences():
+            for start, sentence in iter_sentences(file, chunk_size):
+                starts.append(start)
+                yield sentence
+
+        for result in rewrite_many(sentences(), batch_size=batch_size, n_process=n_process, cache=cache):
+            start = starts.popleft()
+            for edit in result.edits:
+                yield edit._replace(start=start + edit.start, end=start + edit.end)
@@ -0,0 +1,91 @@
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from .cache import ParseCache
+from .document import split_paragraphs, split_sentences
+from .pipeline import rewrite_many
+from .utils import Edit
+
+
+def fingerprint(text: str) -> bytes:
+    """
+    Fingerprint of a paragraph or a sentence.
+    """
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class IncrementalChecker:
+    """
+    Re-checks successive versions of the same document, analysing only what changed.
+
+    The checker keeps the fingerprints of the paragraphs and sentences of the last checked
+    version, with the sentence splitting of each paragraph and the edits of each sentence.
+    On a new version, unchanged paragraphs are not split again and unchanged sentences,
+    wherever they moved, are not parsed again: only new or modified sentences go through
+    the rule-based pipeline, so the cost of a check depends on the size of the edit.
+
+    Attributes:
+    reused (int): Number of sentences whose edits were reused in the last check.
+    analysed (int): Number of sentences analysed in the last check.
+    """
+
+    def __init__(self, batch_size: int = 64, n_process: int = 1, cache: Optional[ParseCache] = None):
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.cache = cache
+        self.reused = 0
+        self.analysed = 0
+        # Paragraph fingerprint -> (start in the paragraph, sentence fingerprint) of its sentences
+        self._paragraphs: Dict[bytes, List[Tuple[int, bytes]]] = {}
+        # Sentence fingerprint -> edits, with offsets relative to the sentence
+        self._sentences: Dict[bytes, List[Edit]] = {}
+
+    def check(self, text: str) -> List[Edit]:
+        """
+        Checks a new version of the document.
+
+        Parameters:
+        text (str): The whole text of the document.
+
+        Returns:
+        List[Edit]: The edits suggested for the document, with start and end as absolute character offsets in text.
+        """
+        paragraphs = {}
+        sentences = {}
+        to_analyse = {}  # Sentence fingerprint -> sentence, for the sentences not seen in the last version
+        layout = []  # (start in the document, sentence fingerprint) of every sentence, in document order
+        self.reused = 0
+
+        for paragraph_start, paragraph in split_paragraphs(text):
+            paragraph_fingerprint = fingerprint(paragraph)
+            paragraph_sentences = self._paragraphs.get(paragraph_fingerprint) or paragraphs.get(paragraph_fingerprint)
+            if paragraph_sentences is None:
+                paragraph_sentences = []
+                for start, sentence in split_sentences(paragraph):
+                    sentence_fingerprint = fingerprint(sentence)
+                    paragraph_sentences.append((start, sentence_fingerprint))
+                    if sentence_fingerprint not in self._sentences:
+                        to_analyse[sentence_fingerprint] = sentence
+            paragraphs[paragraph_fingerprint] = paragraph_sentences
+
+            for start, sentence_fingerprint in paragraph_sentences:
+                layout.append((paragraph_start + start, sentence_fingerprint))
+                if sentence_fingerprint in self._sentences:
+                    if sentence_fingerprint not in sentences:
+                        sentences[sentence_fingerprint] = self._sentences[sentence_fingerprint]
+                    self.reused += 1
+
+        results = rewrite_many(to_analyse.values(), batch_size=self.batch_size, n_process=self.n_process, cache=self.cache)
+        for sentence_fingerprint, result in zip(to_analyse, results):
+            sentences[sentence_fingerprint] = result.edits
+        self.analysed = len(to_analyse)
+
+        # Only the last version is kept, so memory does not grow with the number of checks
+        self._paragraphs = paragraphs
+        self._sentences = sentences
+
+        edits = []
+        for start, sentence_fingerprint in layout:
+            for edit in sentences[sentence_fingerprint]:
+                edits.append(edit._replace(start=start + edit.start, end=start + edit.end))
+        return edits
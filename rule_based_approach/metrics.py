@@ -0,0 +1,225 @@
+import bisect
+import functools
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Tuple
+
+# Instrumentation is off by default: every recording function returns immediately
+_enabled = False
+_lock = threading.Lock()
+
+# Upper bounds of the histogram buckets, by histogram name
+SECONDS_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+BUCKETS = {
+    'stage_seconds': SECONDS_BUCKETS,
+    'sentence_length_tokens': (5, 10, 20, 40, 80, 160, 320),
+}
+
+_counters: Dict[Tuple[str, Tuple], float] = {}
+_histograms: Dict[Tuple[str, Tuple], Dict] = {}
+_sinks: List = []
+
+
+def enable():
+    """
+    Start recording metrics.
+    """
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """
+    Stop recording metrics. Recorded values are kept until reset is called.
+    """
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """
+    Forget all the recorded values.
+    """
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def incr(name: str, value: float = 1, **labels):
+    """
+    Increment a counter, e.g. incr('rewrite_branch', branch='article').
+    """
+    if not _enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels):
+    """
+    Record a value in a histogram, e.g. observe('stage_seconds', 0.01, stage='parse').
+    """
+    if not _enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    bounds = BUCKETS.get(name, SECONDS_BUCKETS)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': bounds, 'counts': [0] * (len(bounds) + 1), 'sum': 0.0, 'count': 0}
+        histogram['counts'][bisect.bisect_left(bounds, value)] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+def timed(stage: str):
+    """
+    Decorator recording the duration of each call of the function in the stage_seconds histogram.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                observe('stage_seconds', time.perf_counter() - start, stage=stage)
+        return wrapper
+    return decorator
+
+
+class _Timer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe('stage_seconds', time.perf_counter() - self.start, stage=self.stage)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(stage: str):
+    """
+    Context manager recording the duration of the block in the stage_seconds histogram.
+    """
+    return _Timer(stage) if _enabled else _NULL_TIMER
+
+
+def snapshot() -> Dict:
+    """
+    Return a copy of the recorded metrics.
+
+    Returns:
+    Dict: {'counters': [(name, labels, value)], 'histograms': [(name, labels, histogram)]}, where labels is a dict
+          and histogram has the bucket upper bounds, the (non-cumulative) count of each bucket plus the overflow
+          bucket, the sum and the count of the recorded values.
+    """
+    with _lock:
+        return {
+            'counters': [(name, dict(labels), value) for (name, labels), value in sorted(_counters.items())],
+            'histograms': [(name, dict(labels), {'buckets': list(histogram['buckets']), 'counts': list(histogram['counts']),
+                                                 'sum': histogram['sum'], 'count': histogram['count']})
+                           for (name, labels), histogram in sorted(_histograms.items())],
+        }
+
+
+def add_sink(sink):
+    """
+    Register a sink: an object with an export(snapshot) method, called by export.
+    """
+    _sinks.append(sink)
+
+
+def remove_sink(sink):
+    _sinks.remove(sink)
+
+
+def export():
+    """
+    Send the current snapshot to all the registered sinks.
+    """
+    current = snapshot()
+    for sink in list(_sinks):
+        sink.export(current)
+
+
+def _format_labels(labels: Dict, **extra) -> str:
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"')) for key, value in items) + '}'
+
+
+def to_prometheus(current: Dict, prefix: str = 'ita_gender_') -> str:
+    """
+    Format a snapshot in the Prometheus text exposition format.
+    """
+    lines = []
+    declared = set()
+    for name, labels, value in current['counters']:
+        metric = prefix + name + '_total'
+        if metric not in declared:
+            lines.append(f'# TYPE {metric} counter')
+            declared.add(metric)
+        lines.append(f'{metric}{_format_labels(labels)} {value}')
+    for name, labels, histogram in current['histograms']:
+        metric = prefix + name
+        if metric not in declared:
+            lines.append(f'# TYPE {metric} histogram')
+            declared.add(metric)
+        cumulative = 0
+        for bound, count in zip(histogram['buckets'] + ['+Inf'], histogram['counts']):
+            cumulative += count
+            lines.append(f'{metric}_bucket{_format_labels(labels, le=bound)} {cumulative}')
+        lines.append(f'{metric}_sum{_format_labels(labels)} {histogram["sum"]}')
+        lines.append(f'{metric}_count{_format_labels(labels)} {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+class PrometheusTextfileSink:
+    """
+    Sink writing the metrics to a file in the Prometheus text format, e.g. for the textfile collector of node_exporter.
+    The file is replaced atomically, so the collector never reads a partial file.
+
+    Parameters:
+    path (str): Path of the .prom file.
+    prefix (str): Prefix of the metric names.
+    """
+
+    def __init__(self, path: str, prefix: str = 'ita_gender_'):
+        self.path = path
+        self.prefix = prefix
+
+    def export(self, current: Dict):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'w') as file:
+            file.write(to_prometheus(current, self.prefix))
+        os.replace(temporary_path, self.path)
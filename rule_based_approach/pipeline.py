@@ -0,0 +1,210 @@
+import time
+from collections import deque
+from pandas import DataFrame
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+import spacy
+
+from . import metrics
+from ._spacy import get_nlp, spacify
+from .cache import ParseCache
+from .component import DETECTOR_NAME, add_detector, get_edits
+from .gender_mappings import articles as default_articles, adjectives as default_adjectives
+from .prefilter import TriggerPrefilter
+from .trigger_lexicon import TriggerLexicon, as_lexicon
+from .utils import Edit, apply_edits, find_initial_nouns, find_unresolved_nouns, identify_nouns_to_modify, modify_sentence_based_on_rules, suggest_edits_skipping_doubled
+
+
+def rewrite_sentence(sentence: str, trigger_words: Union[DataFrame, TriggerLexicon, None] = None,
+                     articles: Optional[Dict] = None, adjectives: Optional[Dict] = None,
+                     prefilter: Optional[TriggerPrefilter] = None) -> str:
+    """
+    Runs the whole rule-based pipeline on a single sentence.
+
+    The sentence is first checked with the prefilter: if it contains no masculine trigger word
+    it is returned unchanged, without being processed by spaCy.
+
+    Parameters:
+    sentence (str): The sentence to be made gender-inclusive.
+    trigger_words (Union[DataFrame, TriggerLexicon, None]): The trigger words. None loads data/trigger_words.csv.
+    articles (dict): Masculine to feminine articles. Defaults to gender_mappings.articles.
+    adjectives (dict): Masculine to feminine adjectives. Defaults to gender_mappings.adjectives.
+    prefilter (TriggerPrefilter): The prefilter to use, e.g. to read its counters afterwards.
+                                  If None, one is built from the trigger words.
+
+    Returns:
+    str: The suggested sentence, or the original sentence if it contains no trigger word.
+    """
+    lexicon = as_lexicon(trigger_words)
+    if prefilter is None:
+        prefilter = TriggerPrefilter(lexicon)
+    if articles is None:
+        articles = default_articles
+    if adjectives is None:
+        adjectives = default_adjectives
+
+    if not prefilter.has_candidates(sentence):
+        return sentence
+
+    doc = spacify(sentence)
+    initial_nouns = find_initial_nouns(doc=doc, trigger_words=lexicon)
+    nouns_to_modify = identify_nouns_to_modify(word_list=initial_nouns, trigger_words=lexicon)
+    return modify_sentence_based_on_rules(doc=doc, nouns_to_modify=nouns_to_modify, trigger_words=lexicon,
+                                          articles=articles, adjectives=adjectives)
+
+
+class RewriteResult(NamedTuple):
+    """
+    Result of the rule-based pipeline for one sentence.
+
+    Attributes:
+    sentence (str): The original sentence.
+    suggestion (str): The suggested sentence, equal to the original one if nothing had to be modified.
+    nouns_to_modify (List[str]): The nouns that were made gender-inclusive.
+    edits (List[Edit]): The edits applied to the sentence, keyed by character offsets.
+    unresolved_nouns (List[str]): The nouns that the rules could not make fully gender-inclusive.
+    """
+    sentence: str
+    suggestion: str
+    nouns_to_modify: List[str]
+    edits: List[Edit]
+    unresolved_nouns: List[str]
+
+
+def _rewrite_doc(doc: spacy.tokens.doc.Doc, lexicon: TriggerLexicon, articles: Dict, adjectives: Dict) -> RewriteResult:
+    """
+    Runs detection, filtering and rewriting on an already parsed sentence, without printing.
+    """
+    initial_nouns = find_initial_nouns(doc=doc, trigger_words=lexicon)
+    nouns_to_modify = identify_nouns_to_modify(word_list=initial_nouns, trigger_words=lexicon, verbose=False)
+    nouns_to_modify, edits = suggest_edits_skipping_doubled(doc, nouns_to_modify, lexicon, articles, adjectives)
+    if not nouns_to_modify:
+        return RewriteResult(doc.text, doc.text, [], [], [])
+    unresolved_nouns = find_unresolved_nouns(nouns_to_modify, edits, lexicon)
+    return RewriteResult(doc.text, apply_edits(doc.text, edits), [str(word[0]) for word in nouns_to_modify], edits,
+                         [str(word[0]) for word in unresolved_nouns])
+
+
+def _result_from_detector(doc: spacy.tokens.doc.Doc) -> RewriteResult:
+    """
+    Builds the result from the annotations set by the gender_inclusive_detector component.
+    """
+    edits = get_edits(doc)
+    return RewriteResult(doc.text, apply_edits(doc.text, edits), [doc[i].text for i in doc._.gendered_nouns], edits,
+                         [doc[i].text for i in doc._.unresolved_nouns])
+
+
+def rewrite_many(sentences: Iterable[str], trigger_words: Union[DataFrame, TriggerLexicon, None] = None,
+                 articles: Optional[Dict] = None, adjectives: Optional[Dict] = None,
+                 batch_size: int = 64, n_process: int = 1,
+                 prefilter: Optional[TriggerPrefilter] = None, cache: Optional[ParseCache] = None) -> Iterator[RewriteResult]:
+    """
+    Runs the rule-based pipeline on a stream of sentences, parsing them in batches with nlp.pipe.
+
+    Sentences are consumed lazily and results are yielded in input order, so memory stays
+    bounded by the batch size whatever the length of the input. Sentences without trigger
+    words are not parsed. With the default trigger words, articles and adjectives, the rules
+    run inside the spaCy pipeline as the gender_inclusive_detector component, so they are
+    parallelised together with parsing when n_process > 1.
+
+    Parameters:
+    sentences (Iterable[str]): The sentences to be made gender-inclusive, e.g. a generator over a file.
+    trigger_words (Union[DataFrame, TriggerLexicon, None]): The trigger words. None loads data/trigger_words.csv.
+    articles (dict): Masculine to feminine articles. Defaults to gender_mappings.articles.
+    adjectives (dict): Masculine to feminine adjectives. Defaults to gender_mappings.adjectives.
+    batch_size (int): Number of sentences parsed together by nlp.pipe.
+    n_process (int): Number of processes used by nlp.pipe for parsing (-1 for all the CPU cores).
+    prefilter (TriggerPrefilter): The prefilter to use. If None, one is built from the trigger words.
+    cache (ParseCache): Cache of parsed sentences to read and fill. Its in-memory tier memoizes the results
+                        obtained with the default trigger words, articles and adjectives.
+
+    Returns:
+    Iterator[RewriteResult]: One result per input sentence, in input order.
+    """
+    use_detector = trigger_words is None and articles is None and adjectives is None
+    lexicon = as_lexicon(trigger_words)
+    if prefilter is None:
+        prefilter = TriggerPrefilter(lexicon)
+    if articles is None:
+        articles = default_articles
+    if adjectives is None:
+        adjectives = default_adjectives
+
+    if use_detector:
+        nlp = add_detector(get_nlp())
+        disable = []
+    else:
+        # Custom rules run after parsing, in this process
+        nlp = get_nlp()
+        disable = [DETECTOR_NAME] if DETECTOR_NAME in nlp.pipe_names else []
+
+    # Sentences read from the input and not yielded yet, in input order, as (sentence, result) pairs.
+    # The result is None while the sentence is waiting for its Doc from nlp.pipe.
+    pending = deque()
+
+    def cached_result(sentence):
+        if use_detector:
+            result = cache.get_result(sentence, nlp)
+            if result is not None:
+                return result
+        doc = cache.get(sentence, nlp)
+        if doc is None:
+            return None
+        if use_detector:
+            result = _result_from_detector(nlp.get_pipe(DETECTOR_NAME)(doc))
+            cache.put_result(sentence, result, nlp)
+            return result
+        return _rewrite_doc(doc, lexicon, articles, adjectives)
+
+    def to_parse():
+        ready_in_a_row = 0
+        for sentence in sentences:
+            metrics.incr('sentences')
+            if not prefilter.has_candidates(sentence):
+                metrics.incr('sentences_skipped')
+                result = RewriteResult(sentence, sentence, [], [], [])
+            elif cache is not None:
+                result = cached_result(sentence)
+            else:
+                result = None
+
+            if result is None:
+                ready_in_a_row = 0
+                pending.append((sentence, None))
+                yield sentence
+            else:
+                pending.append((sentence, result))
+                ready_in_a_row += 1
+                if ready_in_a_row == batch_size:
+                    # Send an empty placeholder through the pipe, so that long runs of sentences that
+                    # need no parsing are yielded without waiting for the next sentence to be parsed
+                    ready_in_a_row = 0
+                    pending.append((None, None))
+                    yield ''
+
+    docs = nlp.pipe(to_parse(), batch_size=batch_size, n_process=n_process, disable=disable)
+    while True:
+        # Time spent waiting for the next Doc, i.e. parsing (and detection, when it runs in the pipeline)
+        start = time.perf_counter()
+        doc = next(docs, None)
+        if doc is None:
+            break
+        metrics.observe('stage_seconds', time.perf_counter() - start, stage='parse')
+        while pending[0][1] is not None:
+            yield pending.popleft()[1]
+        sentence, _ = pending.popleft()
+        if sentence is None:
+            continue
+        metrics.observe('sentence_length_tokens', len(doc))
+        if use_detector:
+            result = _result_from_detector(doc)
+        else:
+            result = _rewrite_doc(doc, lexicon, articles, adjectives)
+        if cache is not None:
+            cache.put(sentence, doc, nlp)
+            if use_detector:
+                cache.put_result(sentence, result, nlp)
+        yield result
+
+    while pending:
+        yield pending.popleft()[1]
@@ -0,0 +1,74 @@
+import functools
+import re
+from pandas import DataFrame
+from typing import Optional, Pattern, Tuple, Union
+
+from .trigger_lexicon import TriggerLexicon, as_lexicon
+
+
+@functools.lru_cache(maxsize=16)
+def _compile(forms: Tuple[str, ...]) -> Optional[Pattern]:
+    """
+    Compiles the masculine forms into a single regular expression, once per set of forms.
+    """
+    if not forms:
+        return None
+    # Longest forms first, so that a form is never shadowed by one of its prefixes
+    forms = sorted(forms, key=len, reverse=True)
+    return re.compile('|'.join(_alternative(form) for form in forms))
+
+
+def _alternative(form: str) -> str:
+    """
+    Pattern of a single form, bounded by non-word characters only on the sides where the form has a word character,
+    so that a form such as "prof." also matches in "il prof.Rossi".
+    """
+    pattern = re.escape(form)
+    if re.match(r'\w', form[:1]):
+        pattern = r'(?<!\w)' + pattern
+    if re.match(r'\w', form[-1:]):
+        pattern += r'(?!\w)'
+    return pattern
+
+
+class TriggerPrefilter:
+    """
+    Cheap lexical check run before spaCy to skip sentences that contain no trigger word.
+
+    All the lowercased masculine forms of the lexicon are compiled into a single regular
+    expression, so a sentence is scanned once regardless of the size of the trigger words list.
+    A sentence without a match cannot produce any noun in find_initial_nouns, so it can be
+    returned unchanged without tagging and parsing it.
+
+    Attributes:
+    checked (int): Number of sentences checked so far.
+    skipped (int): Number of sentences without trigger words, i.e. that did not need parsing.
+    """
+
+    def __init__(self, trigger_words: Union[DataFrame, TriggerLexicon, None] = None):
+        self.pattern = _compile(tuple(as_lexicon(trigger_words).masculine_forms()))
+        self.checked = 0
+        self.skipped = 0
+
+    def has_candidates(self, text: str) -> bool:
+        """
+        Returns True if the text contains at least one masculine trigger word, and updates the counters.
+
+        Parameters:
+        text (str): The sentence to be checked.
+
+        Returns:
+        bool: False if the sentence can be skipped.
+        """
+        self.checked += 1
+        if self.pattern is not None and self.pattern.search(text.lower()):
+            return True
+        self.skipped += 1
+        return False
+
+    def reset(self):
+        """
+        Resets the counters.
+        """
+        self.checked = 0
+        self.skipped = 0
@@ -0,0 +1,309 @@
+"""
+Local HTTP service for the rule-based approach, with request micro-batching.
+
+Usage:
+    python -m rule_based_approach.serve --port 8080 --workers 4
+
+Endpoints (JSON bodies, {"sentence": "..."} or {"sentences": ["...", ...]}):
+    POST /check    nouns to be made gender-inclusive and suggested edits of each sentence
+    POST /rewrite  the same, plus the rewritten sentence
+    GET  /health   liveness check
+
+Sentences of concurrent requests are gathered into micro-batches, bounded by size and by
+waiting time, and parsed with nlp.pipe by a pool of worker processes holding the model.
+When the queue of pending sentences is full, requests are rejected with 503; requests with more
+sentences than the queue can hold, or with sentences longer than MAX_SENTENCE_LENGTH, with 413.
+"""
+import argparse
+import asyncio
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from . import _spacy
+from .component import add_detector
+from .pipeline import rewrite_many
+from .prefilter import TriggerPrefilter
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_SIZE = 1024 * 1024
+
+# Longest sentence accepted, in characters: a sentence is parsed as a whole, with the memory and time it takes
+MAX_SENTENCE_LENGTH = 10000
+
+# Prefilter of the worker process, built once by _init_worker
+_prefilter: Optional[TriggerPrefilter] = None
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+def _init_worker(model: str):
+    """
+    Loads the model and the trigger words in a worker process, before it receives any batch.
+    """
+    global _prefilter
+    _spacy.set_model(model)
+    add_detector(_spacy.get_nlp())
+    _prefilter = TriggerPrefilter()
+
+
+def _process_batch(sentences: List[str]) -> List[Dict]:
+    """
+    Runs the rule-based pipeline on a micro-batch, in a worker process.
+    """
+    results = []
+    # The default trigger words are kept, so that the rules run in the detector component
+    for result in rewrite_many(sentences, batch_size=max(1, len(sentences)), prefilter=_prefilter):
+        results.append({
+            'sentence': result.sentence,
+            'suggestion': result.suggestion,
+            'nouns_to_modify': result.nouns_to_modify,
+            'unresolved_nouns': result.unresolved_nouns,
+            'edits': [edit._asdict() for edit in result.edits],
+        })
+    return results
+
+
+class MicroBatcher:
+    """
+    Gathers the sentences of concurrent requests into batches processed by the worker pool.
+
+    A batch is sent as soon as it has max_batch_size sentences, or max_wait seconds after its
+    first sentence arrived. One batch per worker is in flight at any time.
+
+    Parameters:
+    pool (ProcessPoolExecutor): The worker pool.
+    workers (int): Number of workers of the pool.
+    max_batch_size (int): Maximum number of sentences in a batch.
+    max_wait (float): Maximum time in seconds a sentence waits for its batch to fill up.
+    queue_size (int): Maximum number of sentences waiting for a batch.
+    """
+
+    def __init__(self, pool: ProcessPoolExecutor, workers: int, max_batch_size: int = 32,
+                 max_wait: float = 0.01, queue_size: int = 1024):
+        self.pool = pool
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.tasks = []
+
+    def start(self):
+        self.tasks = [asyncio.ensure_future(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def submit(self, sentences: List[str]) -> Optional[List[asyncio.Future]]:
+        """
+        Queues the sentences of a request. Returns one future per sentence, or None if the queue is full.
+        """
+        if self.queue.maxsize - self.queue.qsize() < len(sentences):
+            return None
+        loop = asyncio.get_event_loop()
+        futures = []
+        for sentence in sentences:
+            future = loop.create_future()
+            self.queue.put_nowait((sentence, future))
+            futures.append(future)
+        return futures
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                results = await loop.run_in_executor(self.pool, _process_batch, [sentence for sentence, _ in batch])
+            except Exception:
+                if len(batch) == 1:
+                    logger.exception('Sentence failed')
+                    self._fail(batch)
+                    continue
+                # Retried one sentence at a time, so that only the sentences that fail by themselves fail
+                logger.exception('Batch of %d sentences failed, retrying each sentence', len(batch))
+                for item in batch:
+                    try:
+                        [result] = await loop.run_in_executor(self.pool, _process_batch, [item[0]])
+                    except Exception:
+                        logger.exception('Sentence failed')
+                        self._fail([item])
+                    else:
+                        self._resolve([item], [result])
+                continue
+            self._resolve(batch, results)
+
+    @staticmethod
+    def _resolve(batch, results):
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _fail(batch):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(RuntimeError('processing failed'))
+
+
+class Service:
+    """
+    Minimal HTTP/1.1 server on asyncio streams exposing /check and /rewrite.
+    """
+
+    def __init__(self, batcher: MicroBatcher):
+        self.batcher = batcher
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'malformed request line'}, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                length = headers.get('content-length', '0').strip() or '0'
+                if not (length.isascii() and length.isdigit()):
+                    await self._respond(writer, 400, {'error': 'invalid Content-Length'}, keep_alive=False)
+                    break
+                length = int(length)
+                if length > MAX_BODY_SIZE:
+                    await self._respond(writer, 413, {'error': 'body too large'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self._dispatch(method, path, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.LimitOverrunError):
+            # Request line or header longer than the limit of the stream reader
+            try:
+                await self._respond(writer, 400, {'error': 'request line or header too long'}, keep_alive=False)
+            except ConnectionError:
+                pass
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes):
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path not in ('/check', '/rewrite'):
+            return 404, {'error': 'not found'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+
+        try:
+            request = json.loads(body or b'{}')
+            sentences = request['sentences'] if 'sentences' in request else [request['sentence']]
+            if not isinstance(sentences, list) or not all(isinstance(sentence, str) for sentence in sentences):
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            return 400, {'error': 'expected {"sentence": str} or {"sentences": [str, ...]}'}
+
+        if len(sentences) > self.batcher.queue.maxsize:
+            return 413, {'error': f'too many sentences, at most {self.batcher.queue.maxsize} per request'}
+        if any(len(sentence) > MAX_SENTENCE_LENGTH for sentence in sentences):
+            return 413, {'error': f'sentence too long, at most {MAX_SENTENCE_LENGTH} characters'}
+
+        futures = self.batcher.submit(sentences)
+        if futures is None:
+            return 503, {'error': 'too many pending sentences, retry later'}
+        try:
+            results = await asyncio.gather(*futures)
+        except Exception:
+            return 500, {'error': 'processing failed'}
+
+        if path == '/check':
+            for result in results:
+                del result['suggestion']
+        return 200, {'results': results}
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Dict, keep_alive: bool):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers = [
+            f'HTTP/1.1 {status} {REASONS[status]}',
+            'Content-Type: application/json; charset=utf-8',
+            f'Content-Length: {len(body)}',
+            'Connection: ' + ('keep-alive' if keep_alive else 'close'),
+        ]
+        if status == 503:
+            headers.append('Retry-After: 1')
+        writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+
+async def serve(host: str, port: int, model: str, workers: int, max_batch_size: int, max_wait: float, queue_size: int):
+    """
+    Loads the model, starts the worker pool and serves requests until cancelled.
+    """
+    # Loaded before the workers are started, so that forked workers share it
+    _spacy.set_model(model)
+    add_detector(_spacy.get_nlp())
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model,)) as pool:
+        # Start the workers and wait for them to load the model before accepting requests, so that
+        # no process is forked later from the running event loop
+        for future in [pool.submit(_process_batch, []) for _ in range(workers)]:
+            future.result()
+        batcher = MicroBatcher(pool, workers, max_batch_size, max_wait, queue_size)
+        batcher.start()
+        server = await asyncio.start_server(Service(batcher).handle, host, port)
+        logger.info('Serving on %s:%d with %d workers', host, port, workers)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await batcher.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--model', default=_spacy.DEFAULT_MODEL, help='spaCy model')
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes')
+    parser.add_argument('--max-batch-size', type=int, default=32, help='maximum number of sentences in a micro-batch')
+    parser.add_argument('--max-wait-ms', type=float, default=10, help='maximum time a sentence waits for its micro-batch')
+    parser.add_argument('--queue-size', type=int, default=1024, help='maximum number of pending sentences')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args.host, args.port, args.model, args.workers, args.max_batch_size,
+                          args.max_wait_ms / 1000, args.queue_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
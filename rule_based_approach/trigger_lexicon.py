@@ -0,0 +1,117 @@
+import functools
+import os
+import pandas as pd
+from pandas import DataFrame
+from typing import Dict, List, Optional, Union
+
+# Default location of the trigger words list shipped with the repository
+TRIGGER_WORDS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'trigger_words.csv')
+
+
+class TriggerLexicon:
+    """
+    Hashed lookup tables built once from the trigger words list.
+
+    Maps every lowercased masculine form (singular and plural) to its lowercased
+    feminine counterpart, so that each lookup is a dictionary access instead of a
+    scan over the trigger words DataFrame.
+
+    Attributes:
+    singular (Dict[str, str]): Mapping from 'maschile_singolare' to 'femminile_singolare'.
+    plural (Dict[str, str]): Mapping from 'maschile_plurale' to 'femminile_plurale'.
+    """
+
+    def __init__(self, singular: Dict[str, str], plural: Dict[str, str]):
+        self.singular = singular
+        self.plural = plural
+
+    @classmethod
+    def from_dataframe(cls, trigger_words: DataFrame) -> 'TriggerLexicon':
+        """
+        Build the lexicon from a DataFrame with the columns of data/trigger_words.csv.
+
+        Parameters:
+        trigger_words (DataFrame): A pandas DataFrame containing columns 'maschile_singolare', 'maschile_plurale',
+                                   'femminile_singolare', and 'femminile_plurale'.
+
+        Returns:
+        TriggerLexicon: The lexicon. When a masculine form appears more than once, the first row wins.
+        """
+        singular = {}
+        plural = {}
+        for masc, fem in zip(trigger_words['maschile_singolare'], trigger_words['femminile_singolare']):
+            if isinstance(masc, str) and isinstance(fem, str):
+                singular.setdefault(masc.lower(), fem.lower())
+        for masc, fem in zip(trigger_words['maschile_plurale'], trigger_words['femminile_plurale']):
+            if isinstance(masc, str) and isinstance(fem, str):
+                plural.setdefault(masc.lower(), fem.lower())
+        return cls(singular, plural)
+
+    @classmethod
+    def from_csv(cls, path: str = TRIGGER_WORDS_PATH, delimiter: str = ';') -> 'TriggerLexicon':
+        """
+        Build the lexicon from a trigger words CSV file.
+
+        Parameters:
+        path (str): Path of the CSV file, data/trigger_words.csv by default.
+        delimiter (str): Field delimiter of the CSV file.
+
+        Returns:
+        TriggerLexicon: The lexicon.
+        """
+        return cls.from_dataframe(pd.read_csv(path, delimiter=delimiter))
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.singular or word in self.plural
+
+    def __len__(self) -> int:
+        return len(self.singular) + len(self.plural)
+
+    def feminine_forms(self, word: str) -> List[str]:
+        """
+        Return the feminine forms of a lowercased masculine word, singular first.
+
+        Parameters:
+        word (str): The lowercased masculine word.
+
+        Returns:
+        List[str]: The matching feminine forms (empty if the word is not a trigger word).
+        """
+        forms = []
+        if word in self.singular:
+            forms.append(self.singular[word])
+        if word in self.plural:
+            forms.append(self.plural[word])
+        return forms
+
+    def masculine_forms(self) -> List[str]:
+        """
+        Return all the lowercased masculine forms, singular and plural, without duplicates.
+        """
+        return list(dict.fromkeys(list(self.singular) + list(self.plural)))
+
+
+@functools.lru_cache(maxsize=None)
+def default_lexicon() -> TriggerLexicon:
+    """
+    Return the lexicon of data/trigger_words.csv, read once per process.
+    """
+    return TriggerLexicon.from_csv()
+
+
+def as_lexicon(trigger_words: Union[DataFrame, TriggerLexicon, None]) -> TriggerLexicon:
+    """
+    Return trigger_words as a TriggerLexicon, building it if a DataFrame is given.
+
+    Parameters:
+    trigger_words (Union[DataFrame, TriggerLexicon, None]): The trigger words. None returns the lexicon
+                                                            of data/trigger_words.csv, see default_lexicon.
+
+    Returns:
+    TriggerLexicon: The lexicon.
+    """
+    if isinstance(trigger_words, TriggerLexicon):
+        return trigger_words
+    if trigger_words is None:
+        return default_lexicon()
+    return TriggerLexicon.from_dataframe(trigger_words)
@@ -1,16 +1,20 @@
 import spacy
 from pandas import DataFrame
-from typing import List, Tuple, Dict
+from typing import List, NamedTuple, Tuple, Dict, Union
 
-def find_initial_nouns(doc: spacy.tokens.doc.Doc, trigger_words: DataFrame) -> List[Tuple[spacy.tokens.token.Token, int]]:
+from . import metrics
+from .trigger_lexicon import TriggerLexicon, as_lexicon
+
+@metrics.timed('find_initial_nouns')
+def find_initial_nouns(doc: spacy.tokens.doc.Doc, trigger_words: Union[DataFrame, TriggerLexicon]) -> List[Tuple[spacy.tokens.token.Token, int]]:
     """
     Identifies and returns words in the given spaCy Doc that match the trigger words
     in the DataFrame and are either NOUN or PROPN (proper noun).
 
     Parameters:
     doc (spacy.tokens.doc.Doc): The spaCy Doc object containing the text to be analyzed.
-    trigger_words (DataFrame): A pandas DataFrame containing columns 'maschile_singolare' 
-                               and 'maschile_plurale' with words to be matched.
+    trigger_words (Union[DataFrame, TriggerLexicon]): A TriggerLexicon, or a pandas DataFrame containing columns
+                                                      'maschile_singolare' and 'maschile_plurale' with words to be matched.
 
     Returns:
     List[Tuple[spacy.tokens.token.Token, int]]: A list of tuples, each containing a matching 
@@ -19,31 +23,54 @@ def find_initial_nouns(doc: spacy.tokens.doc.Doc, trigger_words: DataFrame) -> L
     result = []  # Initialize an empty list to store results
     index = 0  # Initialize an index to track the position of each word in the doc
 
-    # Convert trigger words to lowercase lists for comparison
-    singular_triggers = trigger_words['maschile_singolare'].str.lower().tolist()
-    plural_triggers = trigger_words['maschile_plurale'].str.lower().tolist()
+    lexicon = as_lexicon(trigger_words)
 
     # Iterate over each word in the doc
     for word in doc:
         # Check if the word (in lowercase) is in either the singular or plural trigger words
-        if str(word).lower() in singular_triggers or str(word).lower() in plural_triggers:
+        if str(word).lower() in lexicon:
             # Check if the word is a noun (NOUN) or a proper noun (PROPN)
             if word.pos_ == "NOUN" or word.pos_ == "PROPN":
                 result.append((word, index))  # Add the word and its index to the result list
         index += 1  # Increment the index for the next word
 
+    metrics.incr('triggers_found', len(result))
     return result  # Return the list of matching words and their indices
 
 
-def identify_nouns_to_modify(word_list: List[Tuple[spacy.tokens.token.Token, int]], trigger_words: DataFrame) -> List[Tuple[spacy.tokens.token.Token, int]]:
+def _is_feminine_noun(token: spacy.tokens.token.Token, number: str) -> bool:
+    """
+    Returns True if the token is a feminine NOUN with the given grammatical number ('Sing' or 'Plur').
+    """
+    return token.pos_ == "NOUN" and bool(token.morph.get("Gender")) and token.morph.get("Gender")[0] == "Fem" and \
+        bool(token.morph.get("Number")) and token.morph.get("Number")[0] == number
+
+
+def _is_paired_form(word: spacy.tokens.token.Token, other: spacy.tokens.token.Token, lexicon: TriggerLexicon) -> bool:
+    """
+    Returns True if other is the feminine form of the masculine trigger word, e.g. "candidata" for "candidato".
+    """
+    if _is_feminine_noun(other, "Sing"):
+        if lexicon.singular.get(str(word).lower()) == str(other):
+            return True
+    if _is_feminine_noun(other, "Plur"):
+        if lexicon.plural.get(str(word).lower()) == str(other):
+            return True
+    return False
+
+
+@metrics.timed('identify_nouns_to_modify')
+def identify_nouns_to_modify(word_list: List[Tuple[spacy.tokens.token.Token, int]], trigger_words: Union[DataFrame, TriggerLexicon], verbose: bool = True) -> List[Tuple[spacy.tokens.token.Token, int]]:
     """
     Determines if words need to be gendered and provides information about their gender. 
 
     Parameters:
     word_list (List[Tuple[spacy.tokens.token.Token, int]]): A list of tuples, each containing a word 
                                                            (spaCy Token) and its index in the document.
-    trigger_words (DataFrame): A pandas DataFrame containing columns 'maschile_singolare', 'maschile_plurale', 
-                               'femminile_singolare', and 'femminile_plurale' with words to be matched.
+    trigger_words (Union[DataFrame, TriggerLexicon]): A TriggerLexicon, or a pandas DataFrame containing columns
+                                                      'maschile_singolare', 'maschile_plurale', 'femminile_singolare',
+                                                      and 'femminile_plurale' with words to be matched.
+    verbose (bool): Whether to print the paired forms found and the nouns to be made gender-inclusive.
 
     Returns:
     List[Tuple[spacy.tokens.token.Token, int]]: A list of words that need to be made gender-inclusive.
@@ -51,273 +78,352 @@ def identify_nouns_to_modify(word_list: List[Tuple[spacy.tokens.token.Token, int
     result = []  # List to store words that have both masculine and feminine forms
     to_modify = list(word_list).copy()  # Copy of word_list to keep track of words to be modified
 
+    lexicon = as_lexicon(trigger_words)
+
     for word in word_list:
         # Check conjunctions and the presence of both masculine and feminine forms
         for child in word[0].children:
-            if child.dep_ == 'conj':
-                if child.pos_ == "NOUN" and child.morph.get("Gender") and child.morph.get("Gender")[0] == "Fem" and \
-                        child.morph.get("Number") and child.morph.get("Number")[0] == "Sing":
-                    if str(word[0]).lower() in trigger_words['maschile_singolare'].str.lower().tolist():
-                        index = trigger_words[trigger_words['maschile_singolare'].str.lower() == str(word[0]).lower()].index[0]
-                        if trigger_words['femminile_singolare'][index].lower() == str(child):
-                            result.append((word, f'For the noun \x1B[3m{word[0]}\x1B[0m both the male and female forms are present'))
-                if child.pos_ == "NOUN" and child.morph.get("Gender") and child.morph.get("Gender")[0] == "Fem" and \
-                        child.morph.get("Number") and child.morph.get("Number")[0] == "Plur":
-                    if str(word[0]).lower() in trigger_words['maschile_plurale'].str.lower().tolist():
-                        index = trigger_words[trigger_words['maschile_plurale'].str.lower() == str(word[0]).lower()].index[0]
-                        if trigger_words['femminile_plurale'][index].lower() == str(child):
-                            result.append((word, f'For the noun \x1B[3m{word[0]}\x1B[0m both the male and female forms are present'))
+            if child.dep_ == 'conj' and _is_paired_form(word[0], child, lexicon):
+                result.append((word, f'For the noun \x1B[3m{word[0]}\x1B[0m both the male and female forms are present'))
 
         # Check conjunctions and the presence of both feminine and masculine forms
-        if word[0].dep_ == 'conj':
-            head = word[0].head
-            if head.pos_ == "NOUN" and head.morph.get("Gender") and head.morph.get("Gender")[0] == "Fem" and \
-                    head.morph.get("Number") and head.morph.get("Number")[0] == "Sing":
-                if str(word[0]).lower() in trigger_words['maschile_singolare'].str.lower().tolist():
-                    index = trigger_words[trigger_words['maschile_singolare'].str.lower() == str(word[0]).lower()].index[0]
-                    if trigger_words['femminile_singolare'][index].lower() == str(head):
-                        result.append((word, f'For the noun \x1B[3m{word[0]}\x1B[0m both the male and female forms are present'))
-            if head.pos_ == "NOUN" and head.morph.get("Gender") and head.morph.get("Gender")[0] == "Fem" and \
-                    head.morph.get("Number") and head.morph.get("Number")[0] == "Plur":
-                if str(word[0]).lower() in trigger_words['maschile_plurale'].str.lower().tolist():
-                    index = trigger_words[trigger_words['maschile_plurale'].str.lower() == str(word[0]).lower()].index[0]
-                    if trigger_words['femminile_plurale'][index].lower() == str(head):
-                        result.append((word, f'For the noun \x1B[3m{word[0]}\x1B[0m both the male and female forms are present'))
+        if word[0].dep_ == 'conj' and _is_paired_form(word[0], word[0].head, lexicon):
+            result.append((word, f'For the noun \x1B[3m{word[0]}\x1B[0m both the male and female forms are present'))
 
         # Check for feminine and masculine forms with a comma
         for child in word[0].head.children:
-            if child.pos_ == "NOUN" and child.morph.get("Gender") and child.morph.get("Gender")[0] == "Fem" and \
-                    child.morph.get("Number") and child.morph.get("Number")[0] == "Sing":
-                if str(word[0]).lower() in trigger_words['maschile_singolare'].str.lower().tolist():
-                    index = trigger_words[trigger_words['maschile_singolare'].str.lower() == str(word[0]).lower()].index[0]
-                    if trigger_words['femminile_singolare'][index].lower() == str(child):
-                        result.append((word, f'For the noun \x1B[3m{word[0]}\x1B[0m both the male and female forms are present'))
-            if child.pos_ == "NOUN" and child.morph.get("Gender") and child.morph.get("Gender")[0] == "Fem" and \
-                    child.morph.get("Number") and child.morph.get("Number")[0] == "Plur":
-                if str(word[0]).lower() in trigger_words['maschile_plurale'].str.lower().tolist():
-                    index = trigger_words[trigger_words['maschile_plurale'].str.lower() == str(word[0]).lower()].index[0]
-                    if trigger_words['femminile_plurale'][index].lower() == str(child):
-                        result.append((word, f'For the noun \x1B[3m{word[0]}\x1B[0m both the male and female forms are present'))
+            if _is_paired_form(word[0], child, lexicon):
+                result.append((word, f'For the noun \x1B[3m{word[0]}\x1B[0m both the male and female forms are present'))
 
     # Remove words from to_modify that are already in result
     for el in result:
         if el[0] in to_modify:
             to_modify.remove(el[0])
 
-    # Print results
-    for el in result:
-        print(el[1])
+    metrics.incr('paired_forms_skipped', len(word_list) - len(to_modify))
 
-    # Print words that need to be made gender-inclusive
-    if not to_modify:
-        print('There are no nouns to be made gender inclusive')
-    else:
-        print('The nouns to be made gender inclusive are:')
-        for word in to_modify:
-            print(word[0])
+    if verbose:
+        # Print results
+        for el in result:
+            print(el[1])
+
+        # Print words that need to be made gender-inclusive
+        if not to_modify:
+            print('There are no nouns to be made gender inclusive')
+        else:
+            print('The nouns to be made gender inclusive are:')
+            for word in to_modify:
+                print(word[0])
 
     return to_modify
 
 
-def modify_sentence_based_on_rules(doc: spacy.tokens.doc.Doc, nouns_to_modify: List[Tuple[spacy.tokens.token.Token, int]], trigger_words: DataFrame, articles: Dict, adjectives: Dict) -> str:
+class Edit(NamedTuple):
     """
-    Modifies specific words in a sentence based on given trigger words and rules.
+    A suggested replacement of a span of the original sentence.
+
+    Attributes:
+    start (int): Character offset where the replaced span starts in the sentence.
+    end (int): Character offset where the replaced span ends in the sentence (exclusive).
+    original (str): The replaced text, i.e. sentence[start:end].
+    replacement (str): The suggested text, e.g. "la candidata/il candidato".
+    rule (str): The rule that produced the edit: 'noun' (no article), 'article', 'article_possessive'
+                (article followed by a possessive adjective) or 'possessive' (e.g. "di suo").
+    """
+    start: int
+    end: int
+    original: str
+    replacement: str
+    rule: str
 
-    Parameters:
-    doc (spacy.tokens.doc.Doc): The input sentence as a spaCy Doc object.
-    words_to_modify (list): A list of tuples containing words and their indices in the sentence.
-    trigger_words (dict): A dictionary containing trigger words categorized by masculine and feminine forms.
-    articles (dict): A dictionary mapping masculine articles to their corresponding feminine articles.
-    adjectives (dict): A dictionary mapping masculine adjectives to their corresponding feminine adjectives.
 
-    Returns:
-    str: The modified sentence.
+def _make_edit(doc: spacy.tokens.doc.Doc, first: int, last: int, feminine: str, rule: str) -> Edit:
+    """
+    Builds the edit that replaces the tokens doc[first:last + 1] with "feminine/original", keeping the original casing.
+    """
+    start = doc[first].idx
+    end = doc[last].idx + len(doc[last])
+    original = doc.text[start:end]
+    masculine = original
+    if original[:1].isupper():
+        # The feminine form takes the capital letter of the original text,
+        # which is lowercased if it was only capitalized because it starts the sentence
+        feminine = feminine[:1].upper() + feminine[1:]
+        if first == 0 and not original[1:2].isupper():
+            masculine = original[:1].lower() + original[1:]
+    return Edit(start, end, original, feminine + '/' + masculine, rule)
+
+
+def _noun_edits(doc: spacy.tokens.doc.Doc, element: Tuple[spacy.tokens.token.Token, int], lexicon: TriggerLexicon, articles: Dict, adjectives: Dict) -> List[Edit]:
+    """
+    Computes the candidate edits of a single noun, see suggest_edits.
     """
-    # Convert dictionary keys and values to lists
-    articoli_key = list(articles.keys())
-    articoli_val = list(articles.values())
-    agg_key = list(adjectives.keys())
-    agg_val = list(adjectives.values())
     result = []
-
-    for element in nouns_to_modify:
-        word = str(element[0]).lower()
-        idx = element[1]
-        word_mod = ''
-
-        if idx == 0:  # No article at this position
-            if word in trigger_words['maschile_singolare'].str.lower().tolist():
-                i = trigger_words[trigger_words['maschile_singolare'].str.lower() == word].index[0]
-                fem = trigger_words['femminile_singolare'][i].lower()
-                if word != fem:
-                    word_mod = fem + '/' + word
-                    result.append((word, word_mod))
-                else:
-                    result.append((word, word))
-
-            if word in trigger_words['maschile_plurale'].str.lower().tolist():
-                i = trigger_words[trigger_words['maschile_plurale'].str.lower() == word].index[0]
-                fem = trigger_words['femminile_plurale'][i].lower()
-                if word != fem:
-                    word_mod = fem + '/' + word
-                    result.append((word, word_mod))
-                else:
-                    result.append((word, word))
-
-        elif idx == 1:  # Article is present at this position
-            if (
-                (doc[idx - 1].pos_ == 'DET' and doc[idx - 1].tag_ in ['RD', 'RI']) or
-                (doc[idx - 1].pos_ == 'ADP' and doc[idx - 1].tag_ == 'E_RD')
-            ):
-                # Check if the article is in the 'articoli' dictionary
-                if str(doc[idx - 1]).lower() in articoli_key:
-                    i_art_masc = articoli_key.index(str(doc[idx - 1]).lower())
-                    art_fem = articoli_val[i_art_masc]
-
-                    if word in trigger_words['maschile_singolare'].str.lower().tolist():
-                        i = trigger_words[trigger_words['maschile_singolare'].str.lower() == word].index[0]
-                        fem = trigger_words['femminile_singolare'][i].lower()
-                        if word != fem:
-                            word_mod = art_fem + ' ' + fem + '/' + str(doc[idx - 1:idx + 1])
-                            result.append((str(doc[idx - 1:idx + 1]), word_mod))
-                        else:
-                            word_mod = art_fem + '/' + str(doc[idx - 1:idx + 1])
-                            result.append((str(doc[idx - 1:idx + 1]), word_mod))
-
-                    if word in trigger_words['maschile_plurale'].str.lower().tolist():
-                        i = trigger_words[trigger_words['maschile_plurale'].str.lower() == word].index[0]
-                        fem = trigger_words['femminile_plurale'][i].lower()
-                        if word != fem:
-                            word_mod = art_fem + ' ' + fem + '/' + str(doc[idx - 1:idx + 1])
-                            result.append((str(doc[idx - 1:idx + 1]), word_mod))
-                        else:
-                            word_mod = art_fem + '/' + str(doc[idx - 1:idx + 1])
-                            result.append((str(doc[idx - 1:idx + 1]), word_mod))
-            else:
-                # If the article is not in the dictionary or the previous conditions are not satisfied,
-                # modify the word using only femminile/nome maschile
-                if word in trigger_words['maschile_singolare'].str.lower().tolist():
-                    i = trigger_words[trigger_words['maschile_singolare'].str.lower() == word].index[0]
-                    fem = trigger_words['femminile_singolare'][i].lower()
+    word = str(element[0]).lower()
+    idx = element[1]
+    # Feminine forms of the noun: singular first, then plural
+    feminine_forms = lexicon.feminine_forms(word)
+    # Indices of the (up to) two tokens before the noun, skipping whitespace tokens such as the line breaks of hard-wrapped text
+    previous = []
+    position = idx - 1
+    while position >= 0 and len(previous) < 2:
+        if not doc[position].is_space:
+            previous.append(position)
+        position -= 1
+    prev1 = previous[0] if previous else None
+    prev2 = previous[1] if len(previous) > 1 else None
+
+    if not previous:  # No article at this position
+        for fem in feminine_forms:
+            if word != fem:
+                result.append(_make_edit(doc, idx, idx, fem, 'noun'))
+
+    elif len(previous) == 1:  # Article is present at this position
+        if (
+            (doc[prev1].pos_ == 'DET' and doc[prev1].tag_ in ['RD', 'RI']) or
+            (doc[prev1].pos_ == 'ADP' and doc[prev1].tag_ == 'E_RD')
+        ):
+            # Check if the article is in the 'articoli' dictionary
+            if str(doc[prev1]).lower() in articles:
+                art_fem = articles[str(doc[prev1]).lower()]
+                for fem in feminine_forms:
                     if word != fem:
-                        word_mod = fem + '/' + word
-                        result.append((word, word_mod))
+                        result.append(_make_edit(doc, prev1, idx, art_fem + ' ' + fem, 'article'))
                     else:
-                        result.append((word, word))
+                        result.append(_make_edit(doc, prev1, idx, art_fem, 'article'))
+        else:
+            # If the article is not in the dictionary or the previous conditions are not satisfied,
+            # modify the word using only femminile/nome maschile
+            for fem in feminine_forms:
+                if word != fem:
+                    result.append(_make_edit(doc, idx, idx, fem, 'noun'))
 
-                if word in trigger_words['maschile_plurale'].str.lower().tolist():
-                    i = trigger_words[trigger_words['maschile_plurale'].str.lower() == word].index[0]
-                    fem = trigger_words['femminile_plurale'][i].lower()
-                    if word != fem:
-                        word_mod = fem + '/' + word
-                        result.append((word, word_mod))
-                    else:
-                        result.append((word, word))
-
-        elif idx > 1:
-        # If a possessive adjective follows the article
-            if (
-                (doc[idx - 2].pos_ == 'DET' and doc[idx - 2].tag_ in ['RD', 'RI']) or
-                (doc[idx - 2].pos_ == 'ADP' and doc[idx - 2].tag_ == 'E_RD')
-                ) and (doc[idx - 1].pos_ == 'DET' and doc[idx - 1].tag_ == 'AP'):
-                if str(doc[idx - 2]).lower() in articoli_key and str(doc[idx - 1]).lower() in agg_key:
-                    i_art_masc = articoli_key.index(str(doc[idx - 2]).lower())
-                    art_fem = articoli_val[i_art_masc]
-                    i_agg_masc = agg_key.index(str(doc[idx - 1]).lower())
-                    agg_fem = agg_val[i_agg_masc]
-                    if word in trigger_words['maschile_singolare'].str.lower().tolist():
-                        i = trigger_words[trigger_words['maschile_singolare'].str.lower() == word].index[0]
-                        fem = trigger_words['femminile_singolare'][i].lower()
-                        if word != fem:
-                            word_mod = art_fem + ' ' + agg_fem + ' ' + fem + '/' + str(doc[idx - 2:idx + 1])
-                            result.append((str(doc[idx - 2:idx + 1]), word_mod))
-                        else:
-                            word_mod = art_fem + ' ' + agg_fem + '/' + str(doc[idx - 2:idx + 1])
-                            result.append((str(doc[idx - 2:idx + 1]), word_mod))
-                    if word in trigger_words['maschile_plurale'].str.lower().tolist():
-                        i = trigger_words[trigger_words['maschile_plurale'].str.lower() == word].index[0]
-                        fem = trigger_words['femminile_plurale'][i].lower()
-                        if word != fem:
-                            word_mod = art_fem + ' ' + agg_fem + ' ' + fem + '/' + str(doc[idx - 2:idx + 1])
-                            result.append((str(doc[idx - 2:idx + 1]), word_mod))
-                        else:
-                            word_mod = art_fem + ' ' + agg_fem + '/' + str(doc[idx - 2:idx + 1])
-                            result.append((str(doc[idx - 2:idx + 1]), word_mod))
-
-            # For example, "di suo" -> modify only the possessive adjective
-            elif (doc[idx - 2].pos_ == 'ADP' and doc[idx - 2].tag_ == 'E') and (doc[idx - 1].pos_ == 'DET' and doc[idx - 1].tag_ == 'AP'):
-                if str(doc[idx - 1]).lower() in agg_key:
-                  i_agg_masc = agg_key.index(str(doc[idx - 1]).lower())
-                  agg_fem = agg_val[i_agg_masc]
-                  if word in trigger_words['maschile_singolare'].str.lower().tolist():
-                    i = trigger_words[trigger_words['maschile_singolare'].str.lower() == word].index[0]
-                    fem = trigger_words['femminile_singolare'][i].lower()
-                    if word != fem:
-                        word_mod = agg_fem + ' ' + fem + '/' + str(doc[idx - 1:idx + 1])
-                        result.append((str(doc[idx - 1:idx + 1]), word_mod))
-                    else:
-                        word_mod = agg_fem + '/' + str(doc[idx - 1:idx + 1])
-                        result.append((str(doc[idx - 1:idx + 1]), word_mod))
-                  if word in trigger_words['maschile_plurale'].str.lower().tolist():
-                    i = trigger_words[trigger_words['maschile_plurale'].str.lower() == word].index[0]
-                    fem = trigger_words['femminile_plurale'][i].lower()
+    else:
+    # If a possessive adjective follows the article
+        if (
+            (doc[prev2].pos_ == 'DET' and doc[prev2].tag_ in ['RD', 'RI']) or
+            (doc[prev2].pos_ == 'ADP' and doc[prev2].tag_ == 'E_RD')
+            ) and (doc[prev1].pos_ == 'DET' and doc[prev1].tag_ == 'AP'):
+            if str(doc[prev2]).lower() in articles and str(doc[prev1]).lower() in adjectives:
+                art_fem = articles[str(doc[prev2]).lower()]
+                agg_fem = adjectives[str(doc[prev1]).lower()]
+                for fem in feminine_forms:
                     if word != fem:
-                        word_mod = agg_fem + ' ' + fem + '/' + str(doc[idx - 1:idx + 1])
-                        result.append((str(doc[idx - 1:idx + 1]), word_mod))
+                        result.append(_make_edit(doc, prev2, idx, art_fem + ' ' + agg_fem + ' ' + fem, 'article_possessive'))
                     else:
-                        word_mod = agg_fem + '/' + str(doc[idx - 1:idx + 1])
-                        result.append((str(doc[idx - 1:idx + 1]), word_mod))
-
-            # If the index is greater than 1 but only an article + noun is present
-            elif (doc[idx - 1].pos_ == 'DET' and doc[idx - 1].tag_ in ['RD', 'RI']) or (doc[idx - 1].pos_ == 'ADP' and doc[idx - 1].tag_ == 'E_RD'):
-                if str(doc[idx - 1]).lower() in articoli_key:
-                    i_art_masc = articoli_key.index(str(doc[idx - 1]).lower())
-                    art_fem = articoli_val[i_art_masc]
-                    if word in trigger_words['maschile_singolare'].str.lower().tolist():
-                        i = trigger_words[trigger_words['maschile_singolare'].str.lower() == word].index[0]
-                        fem = trigger_words['femminile_singolare'][i].lower()
-                        if word != fem:
-                            word_mod = art_fem + ' ' + fem + '/' + str(doc[idx - 1:idx + 1])
-                            result.append((str(doc[idx - 1:idx + 1]), word_mod))
-                        else:
-                            word_mod = art_fem + '/' + str(doc[idx - 1:idx + 1])
-                            result.append((str(doc[idx - 1:idx + 1]), word_mod))
-                    if word in trigger_words['maschile_plurale'].str.lower().tolist():
-                        i = trigger_words[trigger_words['maschile_plurale'].str.lower() == word].index[0]
-                        fem = trigger_words['femminile_plurale'][i].lower()
-                        if word != fem:
-                            word_mod = art_fem + ' ' + fem + '/' + str(doc[idx - 1:idx + 1])
-                            result.append((str(doc[idx - 1:idx + 1]), word_mod))
-                        else:
-                            word_mod = art_fem + '/' + str(doc[idx - 1:idx + 1])
-                            result.append((str(doc[idx - 1:idx + 1]), word_mod))
-
-            else:
-            # Modify using only feminine/masculine noun
-                if word in trigger_words['maschile_singolare'].str.lower().tolist():
-                    i = trigger_words[trigger_words['maschile_singolare'].str.lower() == word].index[0]
-                    fem = trigger_words['femminile_singolare'][i].lower()
+                        result.append(_make_edit(doc, prev2, idx, art_fem + ' ' + agg_fem, 'article_possessive'))
+
+        # For example, "di suo" -> modify only the possessive adjective
+        elif (doc[prev2].pos_ == 'ADP' and doc[prev2].tag_ == 'E') and (doc[prev1].pos_ == 'DET' and doc[prev1].tag_ == 'AP'):
+            if str(doc[prev1]).lower() in adjectives:
+                agg_fem = adjectives[str(doc[prev1]).lower()]
+                for fem in feminine_forms:
                     if word != fem:
-                        word_mod = fem + '/' + word
-                        result.append((word, word_mod))
+                        result.append(_make_edit(doc, prev1, idx, agg_fem + ' ' + fem, 'possessive'))
                     else:
-                        result.append((word, word))
-                if word in trigger_words['maschile_plurale'].str.lower().tolist():
-                    i = trigger_words[trigger_words['maschile_plurale'].str.lower() == word].index[0]
-                    fem = trigger_words['femminile_plurale'][i].lower()
+                        result.append(_make_edit(doc, prev1, idx, agg_fem, 'possessive'))
+
+        # If the index is greater than 1 but only an article + noun is present
+        elif (doc[prev1].pos_ == 'DET' and doc[prev1].tag_ in ['RD', 'RI']) or (doc[prev1].pos_ == 'ADP' and doc[prev1].tag_ == 'E_RD'):
+            if str(doc[prev1]).lower() in articles:
+                art_fem = articles[str(doc[prev1]).lower()]
+                for fem in feminine_forms:
                     if word != fem:
-                        word_mod = fem + '/' + word
-                        result.append((word, word_mod))
+                        result.append(_make_edit(doc, prev1, idx, art_fem + ' ' + fem, 'article'))
                     else:
-                        result.append((word, word))
+                        result.append(_make_edit(doc, prev1, idx, art_fem, 'article'))
 
-    sentence = str(doc).lower()
+        else:
+        # Modify using only feminine/masculine noun
+            for fem in feminine_forms:
+                if word != fem:
+                    result.append(_make_edit(doc, idx, idx, fem, 'noun'))
+    return result
 
-    for el in result:
-        if el[1] not in sentence:
-          sentence = sentence.replace(el[0].lower(), el[1].lower())
 
-    print('Suggestion:')
-    print(sentence)
-    return sentence
+def _is_already_doubled(doc: spacy.tokens.doc.Doc, element: Tuple[spacy.tokens.token.Token, int], edits: List[Edit], lexicon: TriggerLexicon) -> bool:
+    """
+    Checks whether the sentence already contains the feminine/masculine form that the edits of a noun would produce,
+    e.g. "la candidata/il candidato" or "candidata/candidato", which the parser does not always mark as a paired form.
+    """
+    text = doc.text.lower()
+    for edit in edits:
+        # The replacement is "feminine/masculine", and the masculine part has the length of the original text
+        feminine = edit.replacement[:len(edit.replacement) - len(edit.original) - 1].lower()
+        if text[:edit.start].endswith(feminine + '/'):
+            return True
+    word = str(element[0]).lower()
+    before = text[:element[0].idx]
+    return any(fem != word and before.endswith(fem + '/') for fem in lexicon.feminine_forms(word))
+
+
+def _undoubled_noun_edits(doc: spacy.tokens.doc.Doc, nouns_to_modify: List[Tuple[spacy.tokens.token.Token, int]], lexicon: TriggerLexicon, articles: Dict, adjectives: Dict) -> List[Tuple[Tuple[spacy.tokens.token.Token, int], List[Edit]]]:
+    """
+    Computes the edits of each noun once, and keeps the nouns whose feminine/masculine form is not already in the sentence.
+    """
+    result = []
+    for element in nouns_to_modify:
+        noun_edits = _noun_edits(doc, element, lexicon, articles, adjectives)
+        # Sentences that were already rewritten, e.g. when a document is checked again after an edit
+        if not _is_already_doubled(doc, element, noun_edits, lexicon):
+            result.append((element, noun_edits))
+    return result
+
+
+def _merge_edits(noun_edits: List[Tuple[Tuple[spacy.tokens.token.Token, int], List[Edit]]]) -> List[Edit]:
+    """
+    Sorts the edits of the nouns by position, keeping the first edit for each span,
+    e.g. when a noun is both a singular and a plural trigger word.
+    """
+    edits = []
+    for edit in sorted((edit for _, edits_of_noun in noun_edits for edit in edits_of_noun), key=lambda edit: edit.start):
+        if not edits or edit.start >= edits[-1].end:
+            edits.append(edit)
+            metrics.incr('rewrite_branch', branch=edit.rule)
+    return edits
+
+
+def remove_doubled_nouns(doc: spacy.tokens.doc.Doc, nouns_to_modify: List[Tuple[spacy.tokens.token.Token, int]], trigger_words: Union[DataFrame, TriggerLexicon], articles: Dict, adjectives: Dict) -> List[Tuple[spacy.tokens.token.Token, int]]:
+    """
+    Removes the nouns whose feminine/masculine form is already in the sentence, e.g. "la candidata/il candidato".
+
+    suggest_edits already leaves these nouns unchanged: removing them beforehand also keeps them out of
+    the nouns to be made gender-inclusive and of the unresolved nouns. Use suggest_edits_skipping_doubled
+    to get both the remaining nouns and their edits without computing the edits twice.
+
+    Parameters:
+    doc (spacy.tokens.doc.Doc): The input sentence as a spaCy Doc object.
+    nouns_to_modify (list): A list of tuples containing words and their indices in the sentence.
+    trigger_words (Union[DataFrame, TriggerLexicon]): The trigger words, as a TriggerLexicon or as the trigger words DataFrame.
+    articles (dict): A dictionary mapping masculine articles to their corresponding feminine articles.
+    adjectives (dict): A dictionary mapping masculine adjectives to their corresponding feminine adjectives.
 
+    Returns:
+    List[Tuple[spacy.tokens.token.Token, int]]: The nouns that still have to be made gender-inclusive.
+    """
+    result = [element for element, _ in _undoubled_noun_edits(doc, nouns_to_modify, as_lexicon(trigger_words), articles, adjectives)]
+    metrics.incr('paired_forms_skipped', len(nouns_to_modify) - len(result))
+    return result
+
+
+@metrics.timed('suggest_edits')
+def suggest_edits(doc: spacy.tokens.doc.Doc, nouns_to_modify: List[Tuple[spacy.tokens.token.Token, int]], trigger_words: Union[DataFrame, TriggerLexicon], articles: Dict, adjectives: Dict) -> List[Edit]:
+    """
+    Computes the edits that make the given nouns gender-inclusive, keyed by character offsets in the sentence.
+
+    Parameters:
+    doc (spacy.tokens.doc.Doc): The input sentence as a spaCy Doc object.
+    nouns_to_modify (list): A list of tuples containing words and their indices in the sentence.
+    trigger_words (Union[DataFrame, TriggerLexicon]): The trigger words categorized by masculine and feminine forms,
+                                                      as a TriggerLexicon or as the trigger words DataFrame.
+    articles (dict): A dictionary mapping masculine articles to their corresponding feminine articles.
+    adjectives (dict): A dictionary mapping masculine adjectives to their corresponding feminine adjectives.
+
+    Returns:
+    List[Edit]: The edits sorted by position, without overlaps.
+    """
+    return _merge_edits(_undoubled_noun_edits(doc, nouns_to_modify, as_lexicon(trigger_words), articles, adjectives))
+
+
+@metrics.timed('suggest_edits')
+def suggest_edits_skipping_doubled(doc: spacy.tokens.doc.Doc, nouns_to_modify: List[Tuple[spacy.tokens.token.Token, int]], trigger_words: Union[DataFrame, TriggerLexicon], articles: Dict, adjectives: Dict) -> Tuple[List[Tuple[spacy.tokens.token.Token, int]], List[Edit]]:
+    """
+    Runs remove_doubled_nouns and suggest_edits, computing the edits of each noun once.
+
+    Parameters:
+    doc (spacy.tokens.doc.Doc): The input sentence as a spaCy Doc object.
+    nouns_to_modify (list): A list of tuples containing words and their indices in the sentence.
+    trigger_words (Union[DataFrame, TriggerLexicon]): The trigger words categorized by masculine and feminine forms,
+                                                      as a TriggerLexicon or as the trigger words DataFrame.
+    articles (dict): A dictionary mapping masculine articles to their corresponding feminine articles.
+    adjectives (dict): A dictionary mapping masculine adjectives to their corresponding feminine adjectives.
+
+    Returns:
+    Tuple[List[Tuple[spacy.tokens.token.Token, int]], List[Edit]]: The nouns that still have to be made gender-inclusive,
+                                                                   and their edits sorted by position, without overlaps.
+    """
+    noun_edits = _undoubled_noun_edits(doc, nouns_to_modify, as_lexicon(trigger_words), articles, adjectives)
+    metrics.incr('paired_forms_skipped', len(nouns_to_modify) - len(noun_edits))
+    return [element for element, _ in noun_edits], _merge_edits(noun_edits)
+
+
+@metrics.timed('apply_edits')
+def apply_edits(text: str, edits: List[Edit]) -> str:
+    """
+    Applies the edits to the text in a single left-to-right pass. Text outside the edits is left untouched.
+
+    Parameters:
+    text (str): The original sentence.
+    edits (List[Edit]): The edits, sorted by position and without overlaps, as returned by suggest_edits.
+
+    Returns:
+    str: The modified sentence.
+    """
+    parts = []
+    position = 0
+    for edit in edits:
+        parts.append(text[position:edit.start])
+        parts.append(edit.replacement)
+        position = edit.end
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+def find_unresolved_nouns(nouns_to_modify: List[Tuple[spacy.tokens.token.Token, int]], edits: List[Edit], trigger_words: Union[DataFrame, TriggerLexicon]) -> List[Tuple[spacy.tokens.token.Token, int]]:
+    """
+    Identifies the nouns that the rules could not make fully gender-inclusive.
+
+    A noun is unresolved if it needed a feminine form but no edit covers it (e.g. its article is
+    not in the articles dictionary), or if one of its masculine determiners or adjectives is left
+    out of the edits (e.g. "questo docente", "il candidato stesso").
+
+    Parameters:
+    nouns_to_modify (List[Tuple[spacy.tokens.token.Token, int]]): The nouns returned by identify_nouns_to_modify.
+    edits (List[Edit]): The edits returned by suggest_edits for the same nouns.
+    trigger_words (Union[DataFrame, TriggerLexicon]): The trigger words, as a TriggerLexicon or as the trigger words DataFrame.
+
+    Returns:
+    List[Tuple[spacy.tokens.token.Token, int]]: The unresolved nouns.
+    """
+    lexicon = as_lexicon(trigger_words)
+
+    def covered(token):
+        return any(edit.start <= token.idx < edit.end for edit in edits)
+
+    result = []
+    for element in nouns_to_modify:
+        word = element[0]
+        needs_feminine = any(fem != str(word).lower() for fem in lexicon.feminine_forms(str(word).lower()))
+        if needs_feminine and not covered(word):
+            result.append(element)
+            continue
+        for child in word.children:
+            if (child.dep_.startswith('det') or child.dep_ == 'amod') and child.morph.get("Gender") == ["Masc"] and not covered(child):
+                result.append(element)
+                break
+    return result
+
+
+def modify_sentence_based_on_rules(doc: spacy.tokens.doc.Doc, nouns_to_modify: List[Tuple[spacy.tokens.token.Token, int]], trigger_words: Union[DataFrame, TriggerLexicon], articles: Dict, adjectives: Dict, verbose: bool = True) -> str:
+    """
+    Modifies specific words in a sentence based on given trigger words and rules.
+
+    Parameters:
+    doc (spacy.tokens.doc.Doc): The input sentence as a spaCy Doc object.
+    words_to_modify (list): A list of tuples containing words and their indices in the sentence.
+    trigger_words (Union[DataFrame, TriggerLexicon]): The trigger words categorized by masculine and feminine forms,
+                                                      as a TriggerLexicon or as the trigger words DataFrame.
+    articles (dict): A dictionary mapping masculine articles to their corresponding feminine articles.
+    adjectives (dict): A dictionary mapping masculine adjectives to their corresponding feminine adjectives.
+    verbose (bool): Whether to print the suggestion.
+
+    Returns:
+    str: The modified sentence, with the original casing. Use suggest_edits to get the single edits.
+    """
+    edits = suggest_edits(doc, nouns_to_modify, trigger_words, articles, adjectives)
+    sentence = apply_edits(doc.text, edits)
+
+    if verbose:
+        print('Suggestion:')
+        print(sentence)
+    return sentence
@@ -0,0 +1,49 @@
+import spacy
+from spacy.tokens import Doc
+
+from rule_based_approach import pipeline
+from rule_based_approach.document import rewrite_document
+
+nlp = spacy.blank('it')
+
+
+class AnnotatedTokenizer:
+    """
+    Tokenizer returning the Docs annotated by hand for known sentences, so that the tests do not need an Italian model.
+    """
+
+    def __init__(self, docs):
+        self.docs = {doc.text: doc for doc in docs}
+        self.tokenizer = nlp.tokenizer
+
+    def __call__(self, text):
+        if text in self.docs:
+            return Doc(nlp.vocab).from_bytes(self.docs[text].to_bytes())
+        return self.tokenizer(text)
+
+    def pipe(self, texts, batch_size=1000):
+        for text in texts:
+            yield self(text)
+
+
+def test_line_break_between_article_and_noun(tmp_path, monkeypatch):
+    # Hard-wrapped text: the line break is a whitespace token between the article and the noun
+    sentence = Doc(nlp.vocab, words=['Gli', '\n', 'studenti', 'sono', 'ammessi', '.'],
+                   spaces=[False, False, True, True, False, False],
+                   pos=['DET', 'SPACE', 'NOUN', 'AUX', 'VERB', 'PUNCT'], tags=['RD', '_SP', 'S', 'VA', 'V', 'FS'],
+                   deps=['det', 'dep', 'nsubj', 'aux', 'ROOT', 'punct'], heads=[2, 0, 4, 4, 4, 4],
+                   morphs=['Gender=Masc|Number=Plur', '', 'Gender=Masc|Number=Plur', '', '', ''])
+    annotated = spacy.blank('it')
+    annotated.tokenizer = AnnotatedTokenizer([sentence])
+    monkeypatch.setattr(pipeline, 'get_nlp', lambda: annotated)
+
+    path = tmp_path / 'document.txt'
+    path.write_text('Premessa.\n\nGli\nstudenti sono ammessi.\n', encoding='utf-8')
+    edits = list(rewrite_document(str(path)))
+
+    assert len(edits) == 1
+    edit = edits[0]
+    assert edit.rule == 'article'
+    assert (edit.start, edit.end) == (11, 23)
+    assert path.read_text(encoding='utf-8')[edit.start:edit.end] == 'Gli\nstudenti'
+    assert edit.replacement == 'Le studentesse/gli\nstudenti'
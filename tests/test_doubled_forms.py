@@ -0,0 +1,45 @@
+import spacy
+from spacy.tokens import Doc
+
+from rule_based_approach.gender_mappings import articles, adjectives
+from rule_based_approach.pipeline import _rewrite_doc
+from rule_based_approach.trigger_lexicon import TriggerLexicon
+from rule_based_approach.utils import apply_edits, find_initial_nouns, identify_nouns_to_modify, suggest_edits
+
+nlp = spacy.blank('it')
+lexicon = TriggerLexicon({'candidato': 'candidata'}, {'candidati': 'candidate'})
+
+
+def make_doc(words, spaces, pos, tags, deps, heads, morphs):
+    # Annotated by hand, so that the tests do not need an Italian model
+    return Doc(nlp.vocab, words=words, spaces=spaces, pos=pos, tags=tags, deps=deps, heads=heads, morphs=morphs)
+
+
+def suggestion(doc):
+    nouns_to_modify = identify_nouns_to_modify(find_initial_nouns(doc, lexicon), lexicon, verbose=False)
+    return apply_edits(doc.text, suggest_edits(doc, nouns_to_modify, lexicon, articles, adjectives))
+
+
+def test_rewrites_masculine_noun():
+    doc = make_doc(['Il', 'candidato', 'deve'], [True, True, False], ['DET', 'NOUN', 'AUX'], ['RD', 'S', 'VM'],
+                   ['det', 'nsubj', 'ROOT'], [1, 2, 2], ['Gender=Masc|Number=Sing', 'Gender=Masc|Number=Sing', ''])
+    assert suggestion(doc) == 'La candidata/il candidato deve'
+
+
+def test_does_not_double_article_and_noun_again():
+    # "La candidata/il candidato deve", as rewritten by the rules, with "candidata" not parsed as a paired form
+    doc = make_doc(['La', 'candidata', '/', 'il', 'candidato', 'deve'], [True, False, False, True, True, False],
+                   ['DET', 'NOUN', 'PUNCT', 'DET', 'NOUN', 'AUX'], ['RD', 'S', 'FB', 'RD', 'S', 'VM'],
+                   ['det', 'nsubj', 'punct', 'det', 'appos', 'ROOT'], [1, 5, 4, 4, 1, 5],
+                   ['Gender=Fem|Number=Sing', 'Gender=Fem|Number=Sing', '', 'Gender=Masc|Number=Sing', 'Gender=Masc|Number=Sing', ''])
+    assert suggestion(doc) == doc.text
+    result = _rewrite_doc(doc, lexicon, articles, adjectives)
+    assert result.suggestion == doc.text
+    assert result.edits == [] and result.unresolved_nouns == []
+
+
+def test_does_not_double_noun_preceded_by_feminine_form():
+    doc = make_doc(['Scrivono', 'candidate', '/', 'candidati'], [True, False, False, False],
+                   ['VERB', 'NOUN', 'PUNCT', 'NOUN'], ['V', 'S', 'FB', 'S'], ['ROOT', 'obj', 'punct', 'appos'], [0, 0, 3, 1],
+                   ['', 'Gender=Fem|Number=Plur', '', 'Gender=Masc|Number=Plur'])
+    assert suggestion(doc) == doc.text